@@ -9,9 +9,7 @@ import numpy as np
 import pandas as pd
 
 '''Web Scraping Libraries'''
-import requests
 from bs4 import BeautifulSoup
-import urllib
 
 '''Regex Library'''
 import re
@@ -22,9 +20,13 @@ import boto3
 from botocore.exceptions import ClientError
 
 '''Time-related Libraries'''
-import time
 from datetime import date
 
+'''Shared Fetch Engine, Indeed Parser and Crawler'''
+import MVP_fetch
+import MVP_indeed
+import MVP_crawl
+
 ###################### Build Helper Functions ####################
 def first_page_url_indeed(job_title, location):
     '''
@@ -44,14 +46,8 @@ def first_page_url_indeed(job_title, location):
         A formatted URL with the job title and location to acquire from
         indeed.com.
     '''
-    # Create the base URL for a job serch at Indeed.com
-    base_url = 'https://www.indeed.com/jobs?'
-    # Create a dictionary to map the keys to the input parameters
-    dic = {'q': job_title, 'l': location, 'sort': 'date'}
-    # Convert the dictionary to a query string
-    relative_url = urllib.parse.urlencode(dic)
-    # Generate the full URL of the first page
-    url = base_url + relative_url
+    # The search URL is shared with the crawl scheduler in MVP_crawl
+    url = MVP_indeed.first_page_url_indeed(job_title, location)
     return url
 
 
@@ -69,14 +65,12 @@ def first_page_soup_indeed(job_title, location):
     '''
     # Generate the URL of the job search based on title and location
     url = first_page_url_indeed(job_title, location)
-    # Make the HTTP request
-    response = requests.get(url)
+    # Make the HTTP request once the rate limiter allows it
+    response = MVP_fetch.get(url)
     # Print the status code of the request
     print("Status code of the request: ", response.status_code)
     # Sanity check to make sure the document type is HTML
     print("Document type: ", response.text[:15])
-    # Take a break
-    time.sleep(5)
     # Make a soup to hold the response content
     soup = BeautifulSoup(response.content, "html.parser")
     # Print out the title of the content
@@ -89,14 +83,12 @@ def page_soup_indeed(url):
     This function returns a BeautifulSoup object to hold the content 
     of a page for a job searching results at Indeed.com
     '''
-    # Make the HTTP request
-    response = requests.get(url)
+    # Make the HTTP request once the rate limiter allows it
+    response = MVP_fetch.get(url)
     # Print the status code of the request
     print("Status code of the request: ", response.status_code)
     # Sanity check to make sure the document type is HTML
     print("Document type: ", response.text[:15])
-    # Take a break
-    time.sleep(5)
     # Make a soup to hold the response content
     soup = BeautifulSoup(response.content, "html.parser")
     # Print out the title of the content
@@ -155,7 +147,7 @@ def job_titles_indeed(job_cards):
             title = 'error'
         else: 
             title = title.text.strip()
-            titles.append(title)
+        titles.append(title)
     return titles
 
 
@@ -172,7 +164,7 @@ def company_names_indeed(job_cards):
             name = 'error'
         else: 
             name = name.text.strip()
-            names.append(name)
+        names.append(name)
     return names
 
 
@@ -189,7 +181,7 @@ def post_ages_indeed(job_cards):
             age = 'error'
         else: 
             age = age.text.strip()
-            ages.append(age)
+        ages.append(age)
     return ages
 
 
@@ -197,42 +189,32 @@ def acquire_indeed_job_description(url):
     '''
     This function accepts the URL of a job posting and pull its description.
     '''
-    # Make the HTTP request
-    request = requests.get(url)
+    # Make the HTTP request once the rate limiter allows it
+    request = MVP_fetch.get(url)
     print("Status Code: ", request.status_code)
-    # Take a break
-    time.sleep(5)
-    # Make a soup variable holding the response content
-    soup = BeautifulSoup(request.content, "html.parser")
-    if soup == None:
-        description = 'error'
-    else:
-        # Print the page's title
-        print(soup.title.string)
-        # Find the section that contains job description
-        description = soup.find('div', id="jobDescriptionText")
-        if description == None:
-            description = 'error'
-        else:
-            description = description.text
+    # Pull the description with the parser backend of MVP_indeed
+    description = MVP_indeed.parse_description(request.content)
     return description
 
 
-def job_links_and_contents_indeed(job_cards):
+def job_links_and_contents_indeed(job_cards, max_workers=4, base_url='https://www.indeed.com'):
     '''
     This function pulls the job links and descriptions from a set of job cards.
+    The descriptions are downloaded concurrently by at most `max_workers` 
+    requests under the per-host rate limiter of MVP_fetch and come back 
+    in the order of the job cards. A failed download is recorded as 'error'.
     '''
-    # Create a list to hold the links and descriptions
+    # Create a list to hold the links
     links = []
-    descriptions = []
-    # For loop through the job cards to pull the links and descriptions
+    # For loop through the job cards to pull the links
     for job in job_cards:
         link = job.find('a')['href']
-        link = 'https://www.indeed.com' + link
+        link = base_url + link
         link = link.replace(';', '&')
-        description = acquire_indeed_job_description(link)
         links.append(link)
-        descriptions.append(description)
+    # Download the descriptions of all the links in parallel
+    descriptions = MVP_fetch.fetch_all(links, acquire_indeed_job_description, 
+                                       max_workers=max_workers)
     return links, descriptions
 
 def job_locations_indeed(job_cards):
@@ -278,65 +260,52 @@ def acquire_page_indeed(url):
     soup = page_soup_indeed(url)
     # Pull the job cards
     job_cards = job_cards_indeed(soup)
-    # Pull the job titles
-    titles = job_titles_indeed(job_cards)   
-    # Pull the names of the companies
-    companies = company_names_indeed(job_cards)
-    # Pull the post ages
-    ages = post_ages_indeed(job_cards)
-    # Pull the job locations
-    locations = job_locations_indeed(job_cards)
-    # Pull the company ratings
-    ratings = company_rating_indeed(job_cards)
-    # Pull the hyperlinks and job description
-    links, descriptions = job_links_and_contents_indeed(job_cards)    
+    return job_cards_frame_indeed(job_cards)
+
+
+def job_cards_frame_indeed(job_cards, max_workers=4, base_url='https://www.indeed.com'):
+    '''
+    This function accepts the job cards of a result page and returns a pandas dataframe 
+    containing job title, location, company, company rating, post age and description. 
+    Every card is parsed in a single pass, so all the columns have one value per card.
+    '''
+    # Pull job title, location, company, company rating, post age and link of every card
+    cards = MVP_indeed.parse_job_cards(job_cards, base_url=base_url)
+    return cards_frame_indeed(cards, max_workers=max_workers)
+
+
+def cards_frame_indeed(cards, max_workers=4):
+    '''
+    This function accepts the parsed job cards (MVP_indeed.JobCard) of a result page, 
+    downloads their descriptions and returns them as a pandas dataframe.
+    '''
+    # Pull the job descriptions of all the links in parallel
+    records = MVP_crawl.page_records(cards, max_workers=max_workers)
     # Create a dataframe
-    d = {'title': titles,
-         'location': locations,
-         'company': companies, 
-         'company_rating': ratings,
-         'post_age': ages, 
-         'job_link': links, 
-         'job_description': descriptions}
-    df = pd.DataFrame(d)
+    df = pd.DataFrame(records, columns=MVP_crawl.COLUMNS)
     return df
 
 
-def jobs_indeed(job_title, location, max_page=35):
+def jobs_indeed(job_title, location, max_page=35, resume=False, store_root=None, stop_fraction=0.5):
     '''
     This function accepts the job title and location and return 
-    the job information pull from Indeed.com.
-    '''
-    # Generate the urls based on job title and location (state)
-    url = first_page_url = first_page_url_indeed(job_title, location)
-    # Print the total number of jobs
-#     print(f"Total number of {job_title} in {location}: ", num_jobs_indeed(url))
-    # Set up an counter
-    counter = 1
-    # Create an empty dataframe to hold the job information
-    df_jobs = pd.DataFrame(columns = ['title', 'location', 'company', 'company_rating', 
-                                      'post_age','job_link', 'job_description'])
-    # Pull the page number
-    page_num = int(page_num_indeed(url))
-    # Set up an checker
-    keep_going = (counter == page_num)
-    # For loop through the urls to pull job information
-    while keep_going and page_num <= max_page:
-        df = acquire_page_indeed(url)
-        print("--------------------------------")
-        print("Page: ", page_num)
-        print("--------------------------------")
-        df_jobs = df_jobs.append(df, ignore_index=True)
-        df_jobs.to_csv("wd_backup.csv") # Backup file in case error response happens.
-        time.sleep(180)
-        dic = {'start': page_num*10}
-        relative_url = urllib.parse.urlencode(dic)
-        url = first_page_url + '&' + relative_url
-        counter = counter + 1
-        page_num = int(page_num_indeed(url))
-        keep_going = (counter == page_num)
-    # Print the total number of jobs
-#     print(f"Total number of {job_title} positions in {location}: ", df_jobs.shape[0])
+    the job information pull from Indeed.com. The job posts of every 
+    page are streamed to the backup file wd_backup.jsonl in case 
+    an error response happens. Set `resume=True` to pick up a crashed 
+    crawl where it stopped without requesting any page or job link twice.
+    Pass the root of the job post store of MVP_store as `store_root`, e.g. "df_wd_tx", 
+    to stop paging once `stop_fraction` of the job posts of a page are already in it.
+    '''
+    # Generate the url of the first page based on job title and location (state)
+    first_page_url = first_page_url_indeed(job_title, location)
+    # Load the job keys of the job post store for an incremental crawl
+    known_keys = None
+    if store_root is not None:
+        known_keys = MVP_crawl.load_job_keys(store_root)
+    # Crawl the result pages
+    df_jobs = MVP_crawl.crawl_indeed(first_page_url, "wd_backup.jsonl", max_page=max_page, 
+                                     resume=resume, known_keys=known_keys, 
+                                     stop_fraction=stop_fraction)
     return df_jobs
 
     
@@ -369,15 +338,23 @@ if __name__ == "__main__":
     # Convert the datetime to string format
     today = today.strftime('%m%d%Y')
     
-    # Name of file to be uploaded to S3 bucket, `wdrawjobpostings`
-    file_name = "wd_tx_indeed_" + today + ".csv"
+    # Job searches to acquire from Indeed.com: (job title, location)
+    queries = [('web developer', 'tx')]
     
-    # Acquire web developer job posts located in Texas from Indeed.com
-    df_wd = jobs_indeed('web developer', 'tx')
-
-    # Save as csv file
-    df_wd.to_csv(file_name)
+    # Acquire the job posts of all the searches at the same time. Results are
+    # sorted by date, so a search stops at the posts acquired by earlier runs.
+    # The index of acquired posts is kept per role, so a posting found by the
+    # searches of both roles goes into both datasets
+    seen_file = 'job_keys_wd.txt'
+    results = MVP_crawl.crawl_queries(queries, incremental=True, seen_file=seen_file)
     
-    # Connect to AWS S3 Account and upload web developer job posts.
+    # Connect to AWS S3 Account
     s3 = boto3.resource('s3')
-    upload_file(file_name=file_name)
\ No newline at end of file
+    for (job_title, location), df_wd in results.items():
+        # Name of file to be uploaded to S3 bucket, `wdrawjobpostings`
+        file_name = f"{MVP_crawl.query_initials(job_title)}_{location}_indeed_{today}.csv"
+        # Save as csv file
+        df_wd.to_csv(file_name)
+        # Upload the job posts; a later run skips them only once they are uploaded
+        if upload_file(file_name=file_name):
+            MVP_crawl.record_job_keys(seen_file, df_wd)
\ No newline at end of file
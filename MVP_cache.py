@@ -0,0 +1,232 @@
+######################## Introduction ###########################
+'''
+This py file holds the on-disk response cache of the fetch engine. Switch it
+on for every fetch made through MVP_fetch with
+
+    MVP_fetch.cache = MVP_cache.ResponseCache('indeed_cache.sqlite')
+
+and replay a crawl from the cache alone, without any network request, with
+
+    MVP_fetch.cache = MVP_cache.ResponseCache('indeed_cache.sqlite', offline=True)
+'''
+###################### Import Libraries #########################
+'''Web Scraping Libraries'''
+import requests
+from requests.structures import CaseInsensitiveDict
+import urllib.parse
+
+'''Storage Libraries'''
+import hashlib
+import sqlite3
+import zlib
+
+'''Concurrency Libraries'''
+import threading
+
+'''Time-related Libraries'''
+import time
+
+###################### Cache Keys ###############################
+
+def normalize_url(url):
+    '''
+    This function returns a canonical form of a url so that the same page
+    always gets the same cache key: lower-case scheme and host, ';' read as
+    '&', query parameters sorted and the fragment dropped.
+    '''
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qsl(parts.query.replace(';', '&'), keep_blank_values=True)
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/',
+                                    urllib.parse.urlencode(sorted(query)), ''))
+
+
+def cache_key(url):
+    '''
+    This function returns the cache key of a url: the SHA-256 of its normalized form.
+    '''
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+###################### Response Cache ###########################
+
+class CacheMiss(LookupError):
+    '''
+    This exception is raised in offline mode for a url that is not in the cache.
+    '''
+
+
+class ResponseCache:
+    '''
+    This class stores successful responses in a SQLite file, compressed with
+    zlib. A response younger than `ttl` is served straight from the cache; an
+    older one is revalidated with its ETag/Last-Modified and served from the
+    cache if the server answers 304 Not Modified. When the bodies take more
+    than `max_bytes`, the least recently used responses are evicted. Writes
+    are committed in batches: by MVP_fetch.fetch_all after every batch of
+    fetches, and after every `commit_every` writes.
+
+    Parameters
+    ----------
+    path : str
+        The SQLite file holding the cache.
+    ttl : float, default 86400
+        Number of seconds a response is served without asking the server.
+    max_bytes : int, default 1 GB
+        Maximum size of the compressed bodies.
+    offline : bool, default False
+        Serve every url from the cache, whatever its age, and raise CacheMiss
+        for a url that is not cached instead of making a request.
+    commit_every : int, default 100
+        Maximum number of writes left uncommitted.
+    '''
+    def __init__(self, path, ttl=86400, max_bytes=2**30, offline=False, commit_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.commit_every = commit_every
+        # Number of writes since the last commit
+        self.uncommitted = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                               key TEXT PRIMARY KEY, url TEXT, status INTEGER,
+                               content_type TEXT, etag TEXT, last_modified TEXT,
+                               stored_at REAL, accessed_at REAL, size INTEGER, body BLOB)''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS lru ON responses (accessed_at)')
+        self.db.commit()
+        # Running size of the bodies, so a store does not scan the table
+        self.total_bytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def written(self):
+        '''
+        This function counts a write and commits once `commit_every` of them
+        are pending. The caller holds the lock.
+        '''
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def commit(self):
+        '''
+        This function commits the pending writes.
+        '''
+        with self.lock:
+            if self.uncommitted:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def entry(self, url):
+        '''
+        This function returns the cached row of a url and marks it as used, or None.
+        '''
+        key = cache_key(url)
+        with self.lock:
+            row = self.db.execute('''SELECT status, content_type, etag, last_modified, stored_at, body
+                                     FROM responses WHERE key = ?''', (key,)).fetchone()
+            if row is not None:
+                self.db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+                self.written()
+        return row
+
+    def response(self, url, row):
+        '''
+        This function rebuilds a requests Response from a cached row.
+        '''
+        status, content_type, etag, last_modified, stored_at, body = row
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response._content = zlib.decompress(body)
+        headers = {'Content-Type': content_type, 'ETag': etag, 'Last-Modified': last_modified}
+        response.headers = CaseInsensitiveDict({k: v for k, v in headers.items() if v is not None})
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def lookup(self, url):
+        '''
+        This function returns the cached response of a url if it can be served
+        without asking the server, otherwise None, together with the cached
+        row of the url (None if it is not cached). The row of a stale response
+        is handed to `revalidation_headers` and `store`, so they do not read
+        it again. In offline mode it returns any cached response and raises
+        CacheMiss for an unknown url.
+        '''
+        row = self.entry(url)
+        if row is None:
+            self.misses += 1
+            if self.offline:
+                raise CacheMiss(url)
+            return None, None
+        if self.offline or time.time() - row[4] < self.ttl:
+            self.hits += 1
+            return self.response(url, row), row
+        return None, row
+
+    def revalidation_headers(self, row):
+        '''
+        This function returns the conditional request headers of the cached
+        row of a stale response, so the server can answer 304 Not Modified.
+        '''
+        headers = {}
+        if row is not None:
+            if row[2] is not None:
+                headers['If-None-Match'] = row[2]
+            if row[3] is not None:
+                headers['If-Modified-Since'] = row[3]
+        return headers
+
+    def store(self, url, response, row=None):
+        '''
+        This function caches a 200 response and returns it. For a 304 response
+        it renews the cached response, whose row `lookup` returned, and returns
+        that one instead.
+        '''
+        key = cache_key(url)
+        now = time.time()
+        if response.status_code == 304:
+            if row is not None:
+                with self.lock:
+                    self.db.execute('UPDATE responses SET stored_at = ? WHERE key = ?', (now, key))
+                    self.written()
+                self.revalidated += 1
+                return self.response(url, row)
+            return response
+        if response.status_code != 200:
+            return response
+        body = zlib.compress(response.content)
+        with self.lock:
+            # A replaced response no longer counts towards the size
+            old = self.db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            if old is not None:
+                self.total_bytes -= old[0]
+            self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            (key, normalize_url(url), response.status_code,
+                             response.headers.get('Content-Type'), response.headers.get('ETag'),
+                             response.headers.get('Last-Modified'), now, now, len(body), body))
+            self.total_bytes += len(body)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+            self.written()
+        return response
+
+    def evict(self):
+        '''
+        This function drops the least recently used responses until the
+        bodies fit in `max_bytes`. The caller holds the lock.
+        '''
+        rows = self.db.execute('SELECT key, size FROM responses ORDER BY accessed_at')
+        evicted = []
+        for key, size in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self.total_bytes -= size
+        self.db.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def close(self):
+        self.commit()
+        self.db.close()
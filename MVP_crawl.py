@@ -0,0 +1,466 @@
+######################## Introduction ###########################
+'''
+This py file runs the crawl of a job search at Indeed.com for the acquire
+modules and streams the job posts to disk page by page.
+'''
+###################### Import Libraries #########################
+'''General Libraries'''
+import pandas as pd
+
+'''File Libraries'''
+import json
+import os
+
+'''Concurrency Libraries'''
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+'''Shared Fetch Engine, Indeed Parser and Job Post Store'''
+import MVP_fetch
+import MVP_indeed
+import MVP_store
+
+# Columns of the job posts produced by a crawl
+COLUMNS = ['title', 'location', 'company', 'company_rating',
+           'post_age', 'job_link', 'job_description']
+
+###################### Streaming Sink ###########################
+
+class JsonLinesSink:
+    '''
+    This class appends job posts to a JSON Lines file, one JSON object per
+    line, as soon as a page is crawled. Writing a page costs the same no
+    matter how long the crawl already is, and the file doubles as the
+    backup in case an error response stops the crawl.
+
+    Parameters
+    ----------
+    path : str
+        The JSON Lines file to write.
+    mode : str, default 'w'
+        'w' starts an empty file, 'a' keeps the posts already in the file.
+    '''
+    def __init__(self, path, mode='w'):
+        self.path = path
+        # Create (or empty) the file
+        open(path, mode).close()
+        # Number of job posts in the file
+        self.num_records = self.count()
+
+    def write(self, records):
+        '''
+        This function appends a list of job posts (dictionaries) to the file.
+        '''
+        with open(self.path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        self.num_records += len(records)
+
+    def truncate(self, num_records):
+        '''
+        This function keeps the first `num_records` job posts of the file
+        and drops the rest.
+        '''
+        records = self.read()[:num_records]
+        with open(self.path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        self.num_records = len(records)
+
+    def count(self):
+        '''
+        This function returns the number of job posts in the file.
+        '''
+        with open(self.path) as f:
+            return sum(1 for line in f if line.strip())
+
+    def read(self):
+        '''
+        This function returns every job post written to the file.
+        '''
+        with open(self.path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def to_frame(self):
+        '''
+        This function builds the dataframe of all the job posts in the file.
+        '''
+        return pd.DataFrame(self.read(), columns=COLUMNS)
+
+###################### Checkpoint ###############################
+
+class CrawlCheckpoint:
+    '''
+    This class records the progress of a crawl so that a crashed crawl can
+    pick up where it stopped. The state file `path` holds the search, the
+    number of completed pages, the URL of the next page and the number of
+    job posts in the backup file after the last completed page. Every job
+    description is also appended to `path`.links as soon as it is
+    downloaded, so a resumed crawl never requests a job link twice.
+    '''
+    def __init__(self, path, first_page_url):
+        self.path = path
+        self.links_path = path + '.links'
+        self.first_page_url = first_page_url
+        self.pages_done = 0
+        self.next_url = first_page_url
+        self.num_records = 0
+        # Map the job links already downloaded to their descriptions
+        self.descriptions = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        '''
+        This function discards any previous progress and starts a new checkpoint.
+        '''
+        open(self.links_path, 'w').close()
+        self.save()
+
+    def load(self):
+        '''
+        This function reads the progress of a previous crawl. It returns False
+        if there is no checkpoint to resume from, or if the crawl it records
+        finished.
+        '''
+        if not os.path.isfile(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        if state['first_page_url'] != self.first_page_url:
+            raise ValueError(f"Checkpoint {self.path} belongs to the search {state['first_page_url']}")
+        if state['next_url'] is None:
+            return False
+        self.pages_done = state['pages_done']
+        self.next_url = state['next_url']
+        self.num_records = state['num_records']
+        if os.path.isfile(self.links_path):
+            with open(self.links_path) as f:
+                for line in f:
+                    # Skip a line cut short by the crash
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.descriptions[record['job_link']] = record['job_description']
+        return True
+
+    def save(self):
+        '''
+        This function writes the state file. The new state replaces the old one
+        in a single rename, so a crash never leaves half a state file behind.
+        '''
+        state = {'first_page_url': self.first_page_url, 'pages_done': self.pages_done,
+                 'next_url': self.next_url, 'num_records': self.num_records}
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(self.path + '.tmp', self.path)
+
+    def description_fetched(self, job_link, description):
+        '''
+        This function records a downloaded job description.
+        '''
+        with self.lock:
+            self.descriptions[job_link] = description
+            with open(self.links_path, 'a') as f:
+                f.write(json.dumps({'job_link': job_link, 'job_description': description}) + '\n')
+
+    def page_done(self, page, num_records):
+        '''
+        This function records a completed result page and the number of
+        job posts in the backup file after it.
+        '''
+        self.pages_done = page.page_num
+        self.next_url = page.next_url
+        self.num_records = num_records
+        self.save()
+
+    def finish(self):
+        '''
+        This function deletes the checkpoint of a crawl that finished, so
+        resuming it starts a new crawl instead of returning the old job posts.
+        '''
+        for path in [self.path, self.links_path]:
+            if os.path.isfile(path):
+                os.remove(path)
+
+###################### Seen Job Index ###########################
+
+class JobKeyIndex:
+    '''
+    This class is a persistent set of the job postings already acquired,
+    keyed by MVP_indeed.job_key. It is checked before any job description
+    is downloaded so that a posting is fetched once across pages, searches
+    and days. The keys are appended to the text file `path`, one per line,
+    only when `save` is called, i.e. once the job posts are saved, so a
+    crashed run acquires them again.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.keys = set()
+        # Keys acquired since the last save
+        self.unsaved = []
+        # Keys being downloaded right now by one of the crawls
+        self.pending = set()
+        self.lock = threading.Lock()
+        if os.path.isfile(path):
+            with open(path) as f:
+                self.keys = set(line.strip() for line in f if line.strip())
+
+    def __contains__(self, job_link):
+        return MVP_indeed.job_key(job_link) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def claim(self, job_link):
+        '''
+        This function returns True and reserves the posting if nobody has
+        acquired or is acquiring it yet, otherwise it returns False.
+        '''
+        key = MVP_indeed.job_key(job_link)
+        with self.lock:
+            if key in self.keys or key in self.pending:
+                return False
+            self.pending.add(key)
+            return True
+
+    def add(self, job_link):
+        '''
+        This function records a posting as acquired, in memory until `save`.
+        '''
+        key = MVP_indeed.job_key(job_link)
+        with self.lock:
+            self.pending.discard(key)
+            if key not in self.keys:
+                self.keys.add(key)
+                self.unsaved.append(key)
+
+    def save(self):
+        '''
+        This function appends the keys acquired since the last save to the file.
+        '''
+        with self.lock:
+            with open(self.path, 'a') as f:
+                for key in self.unsaved:
+                    f.write(key + '\n')
+            self.unsaved = []
+
+    def release(self, job_link):
+        '''
+        This function gives up the reservation of a posting that could not
+        be acquired, so a later crawl tries it again.
+        '''
+        with self.lock:
+            self.pending.discard(MVP_indeed.job_key(job_link))
+
+###################### Crawl ####################################
+
+def record_job_keys(seen_file, df_jobs):
+    '''
+    This function records the job posts of a crawl in the JobKeyIndex file
+    `seen_file`. Call it once the job posts are saved: a posting recorded
+    before is skipped by every later crawl. Expired postings ('error'
+    description) are left out so a later crawl tries them again.
+    '''
+    seen = JobKeyIndex(seen_file)
+    for job_link in df_jobs.job_link[df_jobs.job_description != 'error']:
+        seen.add(job_link)
+    seen.save()
+
+
+def load_job_keys(root):
+    '''
+    This function returns the set of job keys (MVP_indeed.job_key) of the
+    job posts in the date-partitioned store of MVP_store rooted at `root`,
+    e.g. the master dataset df_ds_tx.
+    '''
+    return MVP_store.PartitionedStore(root).job_keys()
+
+
+def known_fraction(cards, known_keys):
+    '''
+    This function returns the fraction of the job cards of a page whose
+    job key is in `known_keys`.
+    '''
+    if not cards:
+        return 1.0
+    known = sum(MVP_indeed.job_key(card.job_link) in known_keys for card in cards)
+    return known / len(cards)
+
+
+
+def page_records(cards, max_workers=4, checkpoint=None, seen=None):
+    '''
+    This function downloads the descriptions of the job cards of a page
+    and returns one job post (dictionary) per card. With a checkpoint,
+    descriptions downloaded before are reused and new ones are recorded.
+    With a JobKeyIndex `seen`, the cards of postings acquired before are
+    skipped without downloading anything.
+    '''
+    # Create a dictionary of the columns
+    d = MVP_indeed.job_cards_columns(cards)
+    known = {} if checkpoint is None else checkpoint.descriptions
+    # Keep the cards the checkpoint has a description for and the postings not seen before
+    keep = [i for i, link in enumerate(d['job_link'])
+            if link in known or seen is None or seen.claim(link)]
+    d = {column: [values[i] for i in keep] for column, values in d.items()}
+
+    def fetch_one(link):
+        try:
+            description = MVP_indeed.job_description(link)
+        except Exception:
+            if seen is not None:
+                seen.release(link)
+            raise
+        if checkpoint is not None:
+            checkpoint.description_fetched(link, description)
+        if seen is not None:
+            # An expired posting is tried again by a later crawl
+            if description == 'error':
+                seen.release(link)
+            else:
+                seen.add(link)
+        return description
+
+    # Pull the job descriptions of the new links in parallel
+    new_links = [link for link in d['job_link'] if link not in known]
+    descriptions = dict(zip(new_links, MVP_fetch.fetch_all(new_links, fetch_one,
+                                                           max_workers=max_workers)))
+    d['job_description'] = [known[link] if link in known else descriptions[link]
+                            for link in d['job_link']]
+    return [dict(zip(COLUMNS, values)) for values in zip(*(d[column] for column in COLUMNS))]
+
+
+def crawl_indeed(first_page_url, backup_file, max_page=35, max_workers=4, resume=False, 
+                 seen=None, known_keys=None, stop_fraction=0.5):
+    '''
+    This function crawls the result pages of a job search, streams the job
+    posts of every page to `backup_file` and returns all of them as a
+    dataframe built once at the end. The progress is checkpointed in
+    `backup_file`.checkpoint after every page and every job description;
+    the checkpoint is deleted once the crawl finishes.
+
+    Parameters
+    ----------
+    first_page_url : str
+        The URL of the first result page.
+    backup_file : str
+        The JSON Lines file the job posts are streamed to.
+    max_page : int, default 35
+        The maximum number of result pages to crawl.
+    max_workers : int, default 4
+        Maximum number of job descriptions downloaded at the same time.
+    resume : bool, default False
+        Pick up a crashed crawl of the same search from its checkpoint: 
+        completed pages and job links already downloaded are not requested 
+        again. Starts a new crawl if there is no crashed crawl to resume.
+    seen : JobKeyIndex, default None
+        Postings acquired before; their cards are skipped.
+    known_keys : set of str, default None
+        Job keys already in the master dataset. The results are sorted by
+        date, so the crawl stops after the first page on which at least
+        `stop_fraction` of the job keys are known. None crawls up to `max_page`.
+    stop_fraction : float, default 0.5
+        See `known_keys`.
+
+    Returns
+    -------
+    df_jobs : pandas.core.DataFrame
+        Columns: title, location, company, company_rating, post_age,
+        job_link, job_description.
+    '''
+    checkpoint = CrawlCheckpoint(backup_file + '.checkpoint', first_page_url)
+    if resume and checkpoint.load():
+        print(f"Resuming after page {checkpoint.pages_done}")
+        sink = JsonLinesSink(backup_file, mode='a')
+        # Drop the job posts of a page that was not completed
+        sink.truncate(checkpoint.num_records)
+    else:
+        sink = JsonLinesSink(backup_file)
+        checkpoint.start()
+    # Loop through the result pages to pull job information
+    pages = MVP_indeed.result_pages_indeed(checkpoint.next_url, max_page=max_page,
+                                           start_page=checkpoint.pages_done + 1)
+    for page in pages:
+        # Check the page against the master dataset before its postings are acquired
+        caught_up = known_keys is not None and known_fraction(page.cards, known_keys) >= stop_fraction
+        sink.write(page_records(page.cards, max_workers=max_workers, checkpoint=checkpoint, 
+                                seen=seen))
+        checkpoint.page_done(page, sink.num_records)
+        print("--------------------------------")
+        print("Page: ", page.page_num)
+        print("--------------------------------")
+        if caught_up:
+            print("Reached the job posts already acquired, stop paging")
+            break
+    # Only a crashed crawl leaves its checkpoint behind
+    checkpoint.finish()
+    return sink.to_frame()
+
+###################### Scheduler ################################
+
+def query_initials(job_title):
+    '''
+    This function returns the initials of a job title used in file names,
+    e.g. 'ds' for 'data scientist' and 'wd' for 'web developer'.
+    '''
+    return ''.join(word[0] for word in job_title.lower().split())
+
+
+def crawl_queries(queries, max_page=35, max_workers=4, resume=False, seen_file='job_keys.txt',
+                  incremental=False, stop_fraction=0.5):
+    '''
+    This function crawls several job searches at the same time and returns
+    the job posts of each of them in the same shape as `jobs_indeed`.
+    All the searches share the rate limiter and the connection pool of
+    MVP_fetch, so together they stay within the one politeness budget of
+    Indeed.com. The job posts of a search are streamed to the backup file
+    `<initials>_<location>_backup.jsonl`, e.g. ds_tx_backup.jsonl.
+
+    Parameters
+    ----------
+    queries : list of (str, str)
+        The (job title, location) of every search,
+        e.g. [('data scientist', 'tx'), ('web developer', 'tx')].
+    max_page : int, default 35
+        The maximum number of result pages to crawl per search.
+    max_workers : int, default 4
+        Maximum number of job descriptions a search downloads at the same time.
+        Keep len(queries) * max_workers within the pool size of MVP_fetch.session.
+    resume : bool, default False
+        Pick up crashed crawls from their checkpoints.
+    seen_file : str or None, default 'job_keys.txt'
+        The JobKeyIndex shared by the searches: a posting is acquired
+        once, by whichever search finds it first, and skipped by later
+        runs once the job posts are saved and recorded with
+        `record_job_keys`. None acquires every posting found. Give every role its own
+        file, e.g. 'job_keys_ds.txt', so a posting found by the searches
+        of two roles ends up in the dataset of each.
+    incremental : bool, default False
+        Stop paging a search once `stop_fraction` of the job keys of a page
+        are in the `seen_file` index, so a daily run only crawls the pages
+        posted since the last run.
+    stop_fraction : float, default 0.5
+        See `incremental`.
+
+    Returns
+    -------
+    results : dict
+        Map every (job title, location) to its dataframe of job posts.
+    '''
+    seen = None if seen_file is None else JobKeyIndex(seen_file)
+    # Postings acquired before this run; the ones acquired during it do not stop a search
+    known_keys = set(seen.keys) if incremental and seen is not None else None
+
+    def crawl(query):
+        job_title, location = query
+        first_page_url = MVP_indeed.first_page_url_indeed(job_title, location)
+        backup_file = f"{query_initials(job_title)}_{location}_backup.jsonl"
+        return crawl_indeed(first_page_url, backup_file, max_page=max_page,
+                            max_workers=max_workers, resume=resume, seen=seen,
+                            known_keys=known_keys, stop_fraction=stop_fraction)
+
+    # Run one crawl per search; the rate limiter paces their requests
+    with ThreadPoolExecutor(max_workers=max(1, len(queries))) as executor:
+        dfs = list(executor.map(crawl, queries))
+    return dict(zip(queries, dfs))
@@ -0,0 +1,177 @@
+######################## Introduction ###########################
+'''
+This py file holds the skill time-series cube of the dashboard: the
+mentions of every library skill aggregated per role, company, city and
+day, week or month. The prepare modules add each day's job posts to it, and
+the plots read small pre-aggregated slices instead of rescanning the posts:
+
+    cube = MVP_cube.SkillCube('skill_cube')
+    cube.update('ds', df)                                   # prepared job posts
+    df_ts = cube.series('ds', ['python', 'sql'], freq='W')  # weekly mean per post
+
+Layout of the cube directory:
+
+    skill_cube/skills_D.parquet     mentions per role, period, company, city, skill
+    skill_cube/postings_D.parquet   job posts per role, period, company, city
+    skill_cube/..._W.parquet, ..._M.parquet
+    skill_cube/keys_ds.npy          fingerprints of the job posts already added
+'''
+###################### Import Libraries #########################
+'''General Libraries'''
+import numpy as np
+import pandas as pd
+
+'''File Libraries'''
+import os
+
+'''Hashing Library'''
+import hashlib
+
+'''Skill Libraries, Skill Matcher and Fingerprint Index'''
+import library
+import MVP_indeed
+import MVP_skills
+import MVP_store
+
+###################### Skill Cube ###############################
+
+# Periods of the cube and the pandas period they stand for, labelled
+# like resample('D'), resample('W') and resample('M') label them
+FREQUENCIES = {'D': 'D', 'W': 'W-SUN', 'M': 'M'}
+
+# Dimensions of the cube besides the skill
+GROUPS = ['role', 'period', 'company', 'city']
+
+
+def period_end(dates, freq):
+    '''
+    This function returns the last day of the period of every date.
+    '''
+    if freq == 'D':
+        return dates.dt.normalize()
+    return dates.dt.to_period(FREQUENCIES[freq]).dt.end_time.dt.normalize()
+
+
+def posting_fingerprints(df):
+    '''
+    This function returns the 64-bit fingerprint of the job key of every job post.
+    '''
+    keys = df.job_link.astype(str).map(MVP_indeed.job_key)
+    digests = [hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest() for key in keys]
+    return np.frombuffer(b''.join(digests), dtype='<u8')
+
+
+def role_skills(role):
+    '''
+    This function returns every skill of the tech, soft and general libraries of a role, e.g. 'ds'.
+    '''
+    skills = [skill for library_type in ['tech', 'soft', 'general']
+              for skill in getattr(library, f'library_{role}_{library_type}')]
+    return list(dict.fromkeys(skills))
+
+
+class SkillCube:
+    '''
+    This class keeps the sums the skill time series are made of, so that
+    adding a day of job posts only adds to them. Means are computed when a
+    slice is read: mentions of a skill / job posts of the period.
+
+    Parameters
+    ----------
+    directory : str, default 'skill_cube'
+        The directory holding the tables of the cube.
+    '''
+    def __init__(self, directory='skill_cube'):
+        self.directory = directory
+
+    def path(self, table, freq):
+        return os.path.join(self.directory, f'{table}_{freq}.parquet')
+
+    def table(self, table, freq):
+        '''
+        This function returns a table of the cube: 'skills' or 'postings' of
+        the frequency 'D', 'W' or 'M'.
+        '''
+        if os.path.exists(self.path(table, freq)):
+            return pd.read_parquet(self.path(table, freq))
+        return pd.DataFrame()
+
+    def save(self, df, table, freq):
+        df.to_parquet(self.path(table, freq) + '.tmp', index=False)
+        os.replace(self.path(table, freq) + '.tmp', self.path(table, freq))
+
+    def update(self, role, df, skills=None):
+        '''
+        This function adds the prepared job posts of a role (with the columns
+        date, company, city, job_link and clean) that are not in the cube yet.
+        The skills default to all the libraries of the role. Returns the
+        number of job posts added.
+        '''
+        os.makedirs(self.directory, exist_ok=True)
+        if skills is None:
+            skills = role_skills(role)
+        # Keep the job posts not added on an earlier day
+        index = MVP_store.FingerprintIndex(os.path.join(self.directory, f'keys_{role}.npy'))
+        fingerprints = posting_fingerprints(df)
+        new = ~index.contains(fingerprints) & ~pd.Series(fingerprints).duplicated().values
+        df = df[new]
+        if df.shape[0] == 0:
+            return 0
+        # Count all the skills of every new job post in one pass
+        counts = MVP_skills.skill_matcher(skills).matrix(df.clean.values).tocoo()
+        matcher_skills = np.array(MVP_skills.skill_matcher(skills).skills, dtype=object)
+        posts = pd.DataFrame({'role': role, 'date': pd.to_datetime(df.date).values,
+                              'company': df.company.astype(str).values, 'city': df.city.astype(str).values})
+        for freq in FREQUENCIES:
+            posts['period'] = period_end(posts.date, freq)
+            # Job posts of every group
+            postings = posts.groupby(GROUPS, dropna=False).size().rename('postings').reset_index()
+            # Mentions of every skill in every group, from the non-zero counts only
+            mentions = posts.iloc[counts.row][GROUPS].assign(skill=matcher_skills[counts.col],
+                                                             mentions=counts.data, postings_mentioning=1)
+            mentions = mentions.groupby(GROUPS + ['skill'], dropna=False).sum().reset_index()
+            # Add them to the sums of the cube
+            for table, new_sums, keys in [('postings', postings, GROUPS),
+                                          ('skills', mentions, GROUPS + ['skill'])]:
+                sums = pd.concat([self.table(table, freq), new_sums], ignore_index=True)
+                self.save(sums.groupby(keys, dropna=False).sum().reset_index(), table, freq)
+        index.add(fingerprints[new])
+        return df.shape[0]
+
+    def series(self, role, skills, freq='W', stat='mean', company=None, city=None):
+        '''
+        This function returns the time series of skills of a role, one column
+        per skill and one row per period, for all companies and cities or
+        only those given.
+
+        Parameters
+        ----------
+        stat : str, default 'mean'
+            'mean'     : mentions of the skill per job post, like
+                         df.resample(freq)[skill].mean()
+            'mentions' : mentions of the skill
+            'count'    : job posts mentioning the skill
+        '''
+        if stat not in ['mean', 'mentions', 'count']:
+            raise ValueError(f"unknown stat {stat!r}, expected 'mean', 'mentions' or 'count'")
+        postings = self.table('postings', freq)
+        mentions = self.table('skills', freq)
+        if postings.shape[0] == 0:
+            return pd.DataFrame(columns=skills, dtype=float)
+        # Select the slice
+        postings = postings[postings.role == role]
+        mentions = mentions[(mentions.role == role) & mentions.skill.isin(skills)]
+        if company is not None:
+            postings = postings[postings.company == company]
+            mentions = mentions[mentions.company == company]
+        if city is not None:
+            postings = postings[postings.city == city]
+            mentions = mentions[mentions.city == city]
+        num_postings = postings.groupby('period').postings.sum()
+        value = 'postings_mentioning' if stat == 'count' else 'mentions'
+        df = mentions.pivot_table(index='period', columns='skill', values=value, aggfunc='sum')
+        df = df.reindex(index=num_postings.index, columns=skills).fillna(0)
+        if stat == 'mean':
+            df = df.div(num_postings, axis=0)
+        df.index.name = 'date'
+        return df
@@ -4,23 +4,19 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# NLP Libraries
-import re
-import nltk
-
-# AWS Librareis
-import boto3
+# Skill Libraries, Skill Matcher and N-gram Counter
+import library
+import MVP_skills
+import MVP_ngrams
 
 ############################################ Helper Functions ####################################################
 def words_variables(df):
     '''
     This function accepts the prepared dataframe with the job descriptioins and return a dictionary 
-    in which the values are the words that appear in the job description. 
+    in which the values are the job descriptions, kept apart so that no n-gram spans two of them. 
     '''
-    # Create the words that appear all the job descritipons
-    all_words = ' '.join(df.clean)
-    # Create a dictionary to hold the variable all_words
-    d_words = {'frequency': all_words}
+    # Create a dictionary to hold the words of every job description
+    d_words = {'frequency': df.clean.tolist()}
     return d_words
 
 def everygram_frequency(d_words, max_len=3):
@@ -28,58 +24,99 @@ def everygram_frequency(d_words, max_len=3):
     This function accetps the dictionary produced by the function `words_variables` and 
     return mono-, bi-, and tri-grams along with their frequencies. 
     '''
-    # Generate mono-, bi-, and tri-grams
-    grams = nltk.everygrams(d_words['frequency'].split(), max_len=max_len) # dtype of grams: <class 'genertor'>
-    # Convert to a list of tuples
-    grams = list(grams)
-    # Create an empty list to hold mono-, bi-, and tri-grams
-    everygram = []
-    # For loop the list of tuples and convert the tuple grams to string grams
-    for gram in grams:
-        str_gram = gram[0]
-        for i in gram[1:]:
-            str_gram = str_gram + ' ' + i
-        everygram.append(str_gram)
-    # Compute the frequency of the everygrams
-    everygram = pd.Series(everygram).value_counts()
+    # A single string is a single document
+    documents = d_words['frequency']
+    if isinstance(documents, str):
+        documents = [documents]
+    # Count the mono-, bi-, and tri-grams of every job description as a sparse matrix
+    counter = MVP_ngrams.NgramCounter(max_len=max_len)
+    counts = counter.fit_transform(documents)
+    # Compute the frequency of the everygrams over all the job descriptions
+    everygram = counter.frequency(counts)
     return everygram
 
-def top_skills(df, k, library, library_type):
+def skill_frequency(df, library, restricted=True):
+    '''
+    This function accepts a prepared dataframe with the job descriptioins and a library of skills and
+    returns the frequency of every skill of the library mentioned in the job descriptions, most frequent first.
+    By default only the n-grams of the library are counted; with `restricted=False` every n-gram is counted
+    and the skills are looked up in the everygram frequencies.
+    '''
+    # Every skill once, in the order of the library
+    skills = list(dict.fromkeys(library))
+    if restricted:
+        # Count the skills of the library in one pass per job description
+        counts = MVP_skills.skill_matcher(skills).matrix(df.clean)
+        frequency = pd.Series(np.asarray(counts.sum(axis=0)).ravel(), index=skills)
+    else:
+        # Look up all the skills in the hashed index of the everygram frequencies at once
+        frequency = everygram_frequency(words_variables(df)).reindex(skills, fill_value=0)
+    # Keep the skills mentioned at least once
+    frequency = frequency[frequency > 0].sort_values(ascending=False, kind='stable')
+    return frequency.rename('frequency')
+
+def rank_skills(frequency, k, library_type):
+    '''
+    This function accepts the frequencies of skills, most frequent first, and returns the dataframe
+    of the top k skills with the columns `top{k}_{library_type}_skills` and `frequency`.
+    '''
+    df_skills = frequency.head(k).to_frame().reset_index()
+    df_skills.columns = [f'top{k}_{library_type}_skills', 'frequency']
+    return df_skills
+
+def top_skills(df, k, library, library_type, initials=None, sink=None):
     '''
     This function accepts a prepared dataframe with the job descriptioins, a positive integer k, a library of skills, 
-    and the type of library then returns a dataframe containing the top k skills needed. In addition, it provides
-    the option to save the datafrme as JSON file and upload to the AWS Bucket additionaljobinfo.
-    '''
-    # Create a string of all words that appear in the job description
-    dic = words_variables(df)
-    # Compute the words frequency
-    gram_frequency = everygram_frequency(dic)
-    # Create an empty dataframe to hold the rank of the skills
-    df_skills = pd.DataFrame()
-    # For loop through the library to find out the frequency of the skills mentioned in the job description
-    for skill in library:
-        mask = (gram_frequency.index == skill)
-        df = gram_frequency[mask]
-        df_skills = pd.concat([df_skills, df])
-    df_skills.columns = dic.keys()
-    df_skills.sort_values(by='frequency', ascending=False, inplace=True)
-    # Reset the index
-    df_skills.reset_index(inplace=True)
-    # Rename the column name
-    df_skills.rename(columns={'index': f'top{k}_{library_type}_skills'}, inplace=True)
-    # Provide the option to save the dataframe as the JSON
-    print("Do you want to save the dataframe as JSON and upload to AWS? (Y/N)")
-    save_file = input()
-    if save_file == "Y" or save_file == "y":
-        print("Enter the INITIALS of the job title:")
-        initials = input()
-        file_name = f"{initials}_top{k}_{library_type}_skills.json"
-        df_skills.head(k).to_json(file_name, orient='records')
-        s3 = boto3.resource('s3')
-        s3.Bucket("additionaljobinfo").upload_file(file_name, file_name)
-    elif save_file == "N" or save_file == 'n':
-        print("The dataframe has NOT been saved.")
-    return df_skills.head(k)
+    and the type of library then returns a dataframe containing the top k skills needed. Given a sink 
+    (see MVP_export) and the initials of the job title, it also exports the dataframe as 
+    `{initials}_top{k}_{library_type}_skills.json`, e.g. to the AWS Bucket additionaljobinfo.
+    '''
+    # Rank the skills of the library mentioned in the job descriptions
+    df_skills = rank_skills(skill_frequency(df, library), k, library_type)
+    # Export the dataframe as JSON
+    if sink is not None:
+        if initials is None:
+            raise ValueError("the initials of the job title are needed to name the exported file")
+        sink.write(df_skills, f"{initials}_top{k}_{library_type}_skills.json")
+    return df_skills
+
+def top_skills_batch(frames, library_types=['tech', 'soft', 'general'], ks=[5, 10], sink=None):
+    '''
+    This function computes the top k skills of every combination of job title, library type and k
+    with a single pass over the job descriptions of each job title.
+
+    Parameters
+    ----------
+    frames : dict
+        Maps the initials of a job title to its prepared dataframe, e.g. {'ds': df_ds, 'wd': df_wd}.
+        The libraries are library.library_{initials}_{library_type}.
+    library_types : list of str, default ['tech', 'soft', 'general']
+    ks : list of int, default [5, 10]
+    sink : default None
+        Where every dataframe is exported (see MVP_export), as in top_skills.
+
+    Returns
+    -------
+    results : dict
+        Maps (initials, library_type, k) to the dataframe of the top k skills.
+    '''
+    results = {}
+    for initials, df in frames.items():
+        libraries = {library_type: getattr(library, f'library_{initials}_{library_type}') 
+                     for library_type in library_types}
+        # Count the skills of all the libraries of the job title at once
+        all_skills = [skill for skills in libraries.values() for skill in skills]
+        frequency = skill_frequency(df, all_skills)
+        for library_type, skills in libraries.items():
+            # Rank the skills of the library in the order top_skills would
+            library_frequency = frequency.reindex(list(dict.fromkeys(skills))).dropna().astype(int)
+            library_frequency = library_frequency.sort_values(ascending=False, kind='stable')
+            for k in ks:
+                df_skills = rank_skills(library_frequency, k, library_type)
+                if sink is not None:
+                    sink.write(df_skills, f"{initials}_top{k}_{library_type}_skills.json")
+                results[(initials, library_type, k)] = df_skills
+    return results
 
 def add_skill_frequency(df, df_top):
     '''
@@ -90,36 +127,35 @@ def add_skill_frequency(df, df_top):
     df_copy = df.reset_index()
     # Create a list of the top skills
     skill_list = df_top.iloc[:, 0].to_list()
-    # Create an empty dictionary to hold the frequency of the skill in each observation
-    dic_frequency = {}
-    # Loop through the list of skills to compute its frequency in each observation
-    for skill in skill_list:
-        list_frequency = []
-        for string in df_copy.clean.values:
-            matches = re.findall(f" {skill} ", string)
-            frequency = len(matches)
-            list_frequency.append(frequency)
-        dic_frequency[skill]=list_frequency    
-    # Convert the dictionary into the dataframe
-    df_frequency = pd.DataFrame(dic_frequency)
+    # Count all the top skills in each observation in a single pass
+    df_frequency = MVP_skills.skill_matcher(skill_list).frame(df_copy.clean.values)
     # Add the frequencies of the top skills to the original dataframe
     df_copy = pd.concat([df_copy, df_frequency], axis=1)
     # Reset the date as the index
     df_copy = df_copy.set_index('date')
     return df_copy
 
-def plot_top_skill_ts(df, df_top):
+def plot_top_skill_ts(df, df_top, cube=None, role=None, freq='W'):
     '''
     This function accetps the dataframe of preapred job postings with the frequencies of the skills
-    and plot how popular each skill changes over time. 
+    and plot how popular each skill changes over time. Given a skill cube (MVP_cube.SkillCube) and 
+    the initials of the job title as the role, the pre-aggregated time series are read from the cube 
+    instead and df can be None; `freq` is 'D', 'W' or 'M'.
     '''
     # Set up the size of the plot
     plt.figure(figsize=(12, 8))
     # Create a list of the top skills
     skill_list = df_top.iloc[:, 0].to_list()
-    # Resample the dataset by week and plot the mean of the frequency of each skill per job posting
-    for skill in skill_list:
-        df.resample('W')[skill].mean().plot(label=f'{skill} Weekly')
+    label = {'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly'}[freq]
+    if cube is not None:
+        # Read the mean of the frequency of each skill per job posting from the cube
+        df_ts = cube.series(role, skill_list, freq=freq)
+        for skill in skill_list:
+            df_ts[skill].plot(label=f'{skill} {label}')
+    else:
+        # Resample the dataset by period and plot the mean of the frequency of each skill per job posting
+        for skill in skill_list:
+            df.resample(freq)[skill].mean().plot(label=f'{skill} {label}')
     
     # Name the plot
     plt.title("How Popular the Top 5 Skills Are Over Time", fontweight='bold')
@@ -0,0 +1,75 @@
+######################## Introduction ###########################
+'''
+This py file holds the sinks the exploration results are exported to.
+Every sink saves a dataframe as a JSON file of records under a file name:
+
+    sink = MVP_export.LocalSink('exports')                     # local directory
+    sink = MVP_export.S3Sink('additionaljobinfo')               # AWS S3 bucket
+    sink = MVP_export.S3Sink('additionaljobinfo',               # local S3 stand-in,
+                             endpoint_url='http://localhost:9000')  # e.g. MinIO or moto
+    sink.write(df_skills, 'ds_top5_tech_skills.json')
+'''
+###################### Import Libraries #########################
+'''File Libraries'''
+import os
+import tempfile
+
+'''AWS S3 Libraries'''
+import logging
+import boto3
+from boto3.exceptions import S3UploadFailedError
+from botocore.exceptions import ClientError
+
+###################### Export Sinks #############################
+
+class LocalSink:
+    '''
+    This class saves dataframes as JSON files in a local directory.
+    '''
+    def __init__(self, directory='.'):
+        self.directory = directory
+
+    def write(self, df, file_name):
+        '''
+        This function saves a dataframe as a JSON file of records and
+        returns True.
+        '''
+        os.makedirs(self.directory, exist_ok=True)
+        df.to_json(os.path.join(self.directory, file_name), orient='records')
+        return True
+
+
+class S3Sink:
+    '''
+    This class uploads dataframes as JSON files to an AWS S3 bucket.
+
+    Parameters
+    ----------
+    bucket : str, default 'additionaljobinfo'
+        The bucket the files are uploaded to.
+    endpoint_url : str, default None
+        The url of an S3-compatible server standing in for AWS, e.g. a local
+        MinIO or moto server. None uploads to AWS.
+    prefix : str, default ''
+        Prepended to every object name, e.g. 'skills/'.
+    '''
+    def __init__(self, bucket='additionaljobinfo', endpoint_url=None, prefix=''):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.prefix = prefix
+        self.s3 = boto3.client('s3', endpoint_url=endpoint_url)
+
+    def write(self, df, file_name):
+        '''
+        This function uploads a dataframe as a JSON file of records.
+        Returns True if it was uploaded, else False.
+        '''
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, file_name)
+            df.to_json(path, orient='records')
+            try:
+                self.s3.upload_file(path, self.bucket, self.prefix + file_name)
+            except (ClientError, S3UploadFailedError) as e:
+                logging.error(e)
+                return False
+        return True
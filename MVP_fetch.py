@@ -0,0 +1,302 @@
+######################## Introduction ###########################
+'''
+This py file holds the shared fetch engine used by the acquire modules
+to download pages from Indeed.com.
+'''
+###################### Import Libraries #########################
+'''Web Scraping Libraries'''
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import urllib.parse
+
+'''Brotli decoding is optional: urllib3 only decodes `br` when it is installed'''
+import importlib.util
+if importlib.util.find_spec('brotli') is not None:
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+else:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+'''Concurrency Libraries'''
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+'''Time-related Libraries'''
+import time
+import datetime
+import email.utils
+
+###################### Rate Limiter #############################
+
+class TokenBucket:
+    '''
+    This class is a token bucket: it refills `rate` tokens per second up to
+    `burst` tokens and every request spends one token. Requests that find the
+    bucket empty reserve a future token and wait for it, so the bucket paces
+    any number of threads at `rate` requests per second on average.
+    '''
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        # Start with a full bucket
+        self.tokens = burst
+        # Time the tokens were last refilled; lies in the future during a pause
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        '''
+        This function spends one token and returns the number of seconds 
+        the caller has to wait before the token is available.
+        '''
+        with self.lock:
+            now = time.monotonic()
+            # Refill the tokens earned since the last update
+            if now > self.updated:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+            self.tokens -= 1
+            # A negative balance is a queue of reservations paid at `rate`
+            ready = self.updated + max(0.0, -self.tokens) / self.rate
+        return max(0.0, ready - now)
+
+    def pause(self, seconds):
+        '''
+        This function stops the bucket from handing out tokens for `seconds`
+        and drops the burst allowance.
+        '''
+        with self.lock:
+            self.updated = max(self.updated, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0)
+
+
+class RateLimiter:
+    '''
+    This class keeps one token bucket per host and adapts its rate to the
+    server: a 429 or 503 response halves the rate of the host and pauses it
+    for the Retry-After period (or an exponential backoff when the header is
+    missing), and every successful response wins back part of the rate until
+    it reaches `rate` again.
+
+    Parameters
+    ----------
+    rate : float, default 1.0
+        Allowed number of requests per second to a host.
+    burst : int, default 5
+        Number of requests a host may receive back to back after being idle.
+    min_rate : float, default 0.05
+        The rate of a host never drops below this value.
+    recovery : float, default 0.1
+        Fraction of `rate` won back by every successful response.
+    backoff : float, default 5.0
+        Seconds a host is paused the first time it throttles without
+        a Retry-After header; doubled for every throttle in a row.
+    max_backoff : float, default 300.0
+        Longest pause without a Retry-After header.
+    '''
+    def __init__(self, rate=1.0, burst=5, min_rate=0.05, recovery=0.1, 
+                 backoff=5.0, max_backoff=300.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Map each host to its token bucket and its number of throttles in a row
+        self.buckets = {}
+        self.throttles = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        '''
+        This function returns the token bucket of the url's host.
+        '''
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+                self.throttles[host] = 0
+            return self.buckets[host]
+
+    def wait(self, url):
+        '''
+        This function blocks until the host of the url has a token left
+        for one more request.
+        '''
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def succeeded(self, url):
+        '''
+        This function records a successful response and raises the rate
+        of the host back towards `rate`.
+        '''
+        bucket = self.bucket(url)
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            self.throttles[host] = 0
+            bucket.rate = min(self.rate, bucket.rate + self.recovery * self.rate)
+
+    def throttled(self, url, retry_after=None):
+        '''
+        This function records a 429/503 response: it halves the rate of the
+        host and pauses the host for `retry_after` seconds, or for an
+        exponential backoff when the server did not say how long to wait.
+        '''
+        bucket = self.bucket(url)
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            self.throttles[host] += 1
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+            if retry_after is None:
+                retry_after = min(self.max_backoff, 
+                                  self.backoff * 2 ** (self.throttles[host] - 1))
+        print(f"Throttled by {host}, pausing for {retry_after:.0f}s")
+        bucket.pause(retry_after)
+
+
+def retry_after_seconds(response):
+    '''
+    This function returns the number of seconds asked for by the Retry-After
+    header of a response, or None if the header is missing or unreadable.
+    The header holds either a number of seconds or an HTTP date.
+    '''
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+# Limiter shared by every fetch made through this module
+limiter = RateLimiter()
+
+###################### HTTP Session #############################
+
+def make_session(pool_size=16, retries=3, backoff_factor=0.5):
+    '''
+    This function returns a requests Session that keeps its connections
+    alive and reuses them across requests, asks for compressed responses
+    and retries connection errors and 500/502/504 responses. 429 and 503
+    are left to the rate limiter.
+
+    Parameters
+    ----------
+    pool_size : int, default 16
+        Number of connections kept open per host. Should not be smaller
+        than the number of threads fetching at the same time.
+    retries : int, default 3
+        Number of retries of a failed connection or a 500/502/504 response.
+    backoff_factor : float, default 0.5
+        Retries wait backoff_factor * 2 ** (retry - 1) seconds.
+
+    Returns
+    -------
+    session : requests.Session
+    '''
+    retry = Retry(total=retries, backoff_factor=backoff_factor,
+                  status_forcelist=(500, 502, 504), allowed_methods=frozenset(['GET']),
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    return session
+
+
+# Session shared by every fetch made through this module
+session = make_session()
+
+# Response cache consulted by every fetch, e.g. MVP_cache.ResponseCache; None disables it
+cache = None
+
+###################### Fetch Functions ##########################
+
+# Status codes of a server asking the crawler to slow down
+THROTTLE_STATUS = (429, 503)
+
+
+def get(url, timeout=30, max_retries=5):
+    '''
+    This function makes the HTTP request through the shared session once
+    the rate limiter allows it. A 429 or 503 response slows the host down 
+    and the request is retried up to `max_retries` times. When a response 
+    cache is set (see MVP_cache), fresh cached responses are served without 
+    a request and stale ones are revalidated.
+
+    Parameters
+    ----------
+    url : str
+        The URL to request.
+    timeout : int or float, default 30
+        Number of seconds to wait for the server before giving up.
+    max_retries : int, default 5
+        Number of retries after a 429 or 503 response.
+
+    Returns
+    -------
+    response : requests.models.Response
+        The last response received.
+    '''
+    headers = {}
+    if cache is not None:
+        response, row = cache.lookup(url)
+        if response is not None:
+            return response
+        headers = cache.revalidation_headers(row)
+    for attempt in range(max_retries + 1):
+        limiter.wait(url)
+        response = session.get(url, timeout=timeout, headers=headers)
+        if response.status_code not in THROTTLE_STATUS:
+            limiter.succeeded(url)
+            break
+        limiter.throttled(url, retry_after_seconds(response))
+    if cache is not None:
+        response = cache.store(url, response, row)
+    return response
+
+
+def fetch_all(urls, fetch_one, max_workers=4, error='error'):
+    '''
+    This function calls `fetch_one` on every url with at most `max_workers`
+    requests in flight and returns the results in the same order as the urls.
+    A url whose fetch raises an exception is recorded as `error`.
+
+    Parameters
+    ----------
+    urls : list of str
+        The URLs to fetch, e.g. the job links of a page of job cards.
+    fetch_one : function
+        Accepts one url and returns its result, e.g.
+        `acquire_indeed_job_description`.
+    max_workers : int, default 4
+        Maximum number of concurrent requests.
+    error : object, default 'error'
+        Value recorded for a url whose fetch fails.
+
+    Returns
+    -------
+    results : list
+        One result per url, in the order of `urls`.
+    '''
+    def safe_fetch(url):
+        try:
+            return fetch_one(url)
+        except Exception as e:
+            print("Fetch failed: ", url, e)
+            return error
+
+    # Map keeps the results in the order of the urls
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(safe_fetch, urls))
+    # Commit the responses cached by the batch at once
+    if cache is not None:
+        cache.commit()
+    return results
@@ -0,0 +1,339 @@
+######################## Introduction ###########################
+'''
+This py file parses the search result pages and job postings of Indeed.com.
+It is shared by the acquire modules so that every result page is downloaded
+and parsed once, and lets them choose the HTML parser doing the work.
+'''
+###################### Import Libraries #########################
+'''Web Scraping Libraries'''
+from bs4 import BeautifulSoup
+import urllib.parse
+
+'''Optional Parser Backends: lxml and selectolax are used when installed'''
+try:
+    import lxml
+except ImportError:
+    lxml = None
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    # selectolax before 0.3 only ships the Modest parser
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+'''Regex Library'''
+import re
+
+'''Shared Fetch Engine'''
+import MVP_fetch
+
+###################### Search URL ###############################
+
+def first_page_url_indeed(job_title, location):
+    '''
+    This function returns a URL of the 1st page of a job search at Indeed.com 
+    based on the job title and the location, sorted by date.
+    '''
+    # Create a dictionary to map the keys to the input parameters
+    dic = {'q': job_title, 'l': location, 'sort': 'date'}
+    # Generate the full URL of the first page
+    return 'https://www.indeed.com/jobs?' + urllib.parse.urlencode(dic)
+
+
+def job_key(job_link):
+    '''
+    This function returns the key identifying a job posting in its link: the
+    `jk` parameter, e.g. 'abc123' for https://www.indeed.com/rc/clk?jk=abc123&fccid=0.
+    Links without a `jk` parameter are keyed by their lower-cased host and path.
+    '''
+    parts = urllib.parse.urlsplit(job_link)
+    jk = urllib.parse.parse_qs(parts.query.replace(';', '&')).get('jk')
+    if jk:
+        return jk[0]
+    return (parts.netloc + parts.path).lower()
+
+###################### Job Cards ################################
+
+class JobCard:
+    '''
+    This class holds the fields of one job card. Fields missing from
+    the card are 'error', a missing company rating is 'missing'.
+    '''
+    __slots__ = ('title', 'location', 'company', 'company_rating', 'post_age', 'job_link')
+
+    def __init__(self, title, location, company, company_rating, post_age, job_link):
+        self.title = title
+        self.location = location
+        self.company = company
+        self.company_rating = company_rating
+        self.post_age = post_age
+        self.job_link = job_link
+
+
+def tag_text(tag, missing='error'):
+    '''
+    This function returns the stripped text of a tag, or `missing` if the tag was not found.
+    '''
+    if tag is None:
+        return missing
+    return tag.text.strip()
+
+
+def parse_job_card(job, base_url='https://www.indeed.com'):
+    '''
+    This function pulls every field of a job card in one visit and returns a JobCard.
+    '''
+    # The location sits in a div on some cards and in a span on others
+    location = job.find(class_='location accessible-contrast-color-location')
+    link = job.find('a')
+    if link is None:
+        job_link = 'error'
+    else:
+        job_link = (base_url + link['href']).replace(';', '&')
+    return JobCard(title=tag_text(job.find('h2', class_='title')),
+                   location=tag_text(location),
+                   company=tag_text(job.find('span', class_='company')),
+                   company_rating=tag_text(job.find('span', class_='ratingsContent'), 'missing'),
+                   post_age=tag_text(job.find('span', class_='date')),
+                   job_link=job_link)
+
+
+def parse_job_cards(job_cards, base_url='https://www.indeed.com'):
+    '''
+    This function parses a set of job cards in a single pass and returns one
+    JobCard per card, so every field has exactly one value per card.
+    '''
+    return [parse_job_card(job, base_url) for job in job_cards]
+
+
+def job_cards_columns(cards):
+    '''
+    This function turns a list of JobCard objects into a dictionary
+    of columns in the order of the JobCard fields.
+    '''
+    return {field: [getattr(card, field) for card in cards] for field in JobCard.__slots__}
+
+###################### Result Pages #############################
+
+class ResultPage:
+    '''
+    This class holds everything the crawler needs from one parsed result page.
+
+    Attributes
+    ----------
+    url : str
+        The URL the page was downloaded from.
+    page_num : int
+        The page number shown in `searchCountPages`.
+    num_jobs : int
+        The total number of jobs shown in `searchCountPages`.
+    cards : list of JobCard
+        The parsed job cards of the page.
+    next_url : str or None
+        The URL of the next result page, None on the last page.
+    '''
+    __slots__ = ('url', 'page_num', 'num_jobs', 'cards', 'next_url')
+
+    def __init__(self, url, page_num, num_jobs, cards, next_url):
+        self.url = url
+        self.page_num = page_num
+        self.num_jobs = num_jobs
+        self.cards = cards
+        self.next_url = next_url
+
+
+def page_counter_indeed(soup):
+    '''
+    This function reads the page number and the total number of jobs
+    from the `searchCountPages` section, e.g. "Page 2 of 1,234 jobs".
+    '''
+    div = soup.find('div', id='searchCountPages')
+    numbers = re.findall(r'(\d+)', div.text.replace(',', ''))
+    return int(numbers[0]), int(numbers[1])
+
+
+def next_page_url_indeed(soup, url, page_num):
+    '''
+    This function returns the URL of the page after `page_num`. It follows the
+    "Next" link of the pagination bar, returns None when the bar has no such
+    link, and falls back to the `start` offset of the search when the page
+    has no pagination bar at all.
+    '''
+    pagination = soup.find('div', class_='pagination')
+    if pagination is None:
+        # Drop the offset of the current page and ask for the next one
+        base_url = re.sub(r'&start=\d+', '', url)
+        return base_url + '&' + urllib.parse.urlencode({'start': page_num*10})
+    link = pagination.find('a', attrs={'aria-label': 'Next'})
+    if link is None:
+        return None
+    return urllib.parse.urljoin(url, link['href'])
+
+
+def site_url(url):
+    '''
+    This function returns the scheme and host of a url, e.g. 'https://www.indeed.com'.
+    '''
+    parts = urllib.parse.urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+###################### Parser Backends ##########################
+
+class SoupBackend:
+    '''
+    This class parses the pages with BeautifulSoup. `features` is the tree
+    builder: "html.parser" is the pure-Python parser the acquire modules
+    always used, "lxml" builds the same soup with the C parser of lxml.
+    '''
+    def __init__(self, features):
+        self.name = features
+        self.features = features
+
+    def parse_result_page(self, content, url):
+        soup = BeautifulSoup(content, self.features)
+        page_num, num_jobs = page_counter_indeed(soup)
+        # Find the appropriate tag that contains all of the job listings in this page
+        tag = soup.find('td', id="resultsCol")
+        job_cards = tag.find_all('div', class_='jobsearch-SerpJobCard')
+        cards = parse_job_cards(job_cards, base_url=site_url(url))
+        next_url = next_page_url_indeed(soup, url, page_num)
+        return ResultPage(url, page_num, num_jobs, cards, next_url)
+
+    def parse_description(self, content):
+        soup = BeautifulSoup(content, self.features)
+        description = soup.find('div', id="jobDescriptionText")
+        if description is None:
+            return 'error'
+        return description.text
+
+
+class SelectolaxBackend:
+    '''
+    This class parses the pages with the C-based HTML parser of selectolax
+    and finds the fields with CSS selectors.
+    '''
+    name = 'selectolax'
+
+    def node_text(self, node, missing='error'):
+        if node is None:
+            return missing
+        return node.text().strip()
+
+    def parse_job_card(self, job, base_url):
+        link = job.css_first('a')
+        if link is None or link.attributes.get('href') is None:
+            job_link = 'error'
+        else:
+            job_link = (base_url + link.attributes['href']).replace(';', '&')
+        return JobCard(title=self.node_text(job.css_first('h2.title')),
+                       location=self.node_text(job.css_first('.location.accessible-contrast-color-location')),
+                       company=self.node_text(job.css_first('span.company')),
+                       company_rating=self.node_text(job.css_first('span.ratingsContent'), 'missing'),
+                       post_age=self.node_text(job.css_first('span.date')),
+                       job_link=job_link)
+
+    def parse_result_page(self, content, url):
+        tree = HTMLParser(content)
+        numbers = re.findall(r'(\d+)', tree.css_first('#searchCountPages').text().replace(',', ''))
+        page_num, num_jobs = int(numbers[0]), int(numbers[1])
+        base_url = site_url(url)
+        cards = [self.parse_job_card(job, base_url) 
+                 for job in tree.css('td#resultsCol div.jobsearch-SerpJobCard')]
+        # Same rules as `next_page_url_indeed`
+        if tree.css_first('div.pagination') is None:
+            next_url = re.sub(r'&start=\d+', '', url) + '&' + urllib.parse.urlencode({'start': page_num*10})
+        else:
+            link = tree.css_first('div.pagination a[aria-label="Next"]')
+            next_url = None if link is None else urllib.parse.urljoin(url, link.attributes['href'])
+        return ResultPage(url, page_num, num_jobs, cards, next_url)
+
+    def parse_description(self, content):
+        description = HTMLParser(content).css_first('div#jobDescriptionText')
+        if description is None:
+            return 'error'
+        return description.text()
+
+
+# Map the name of every installed backend to its parser
+BACKENDS = {'html.parser': SoupBackend('html.parser')}
+if lxml is not None:
+    BACKENDS['lxml'] = SoupBackend('lxml')
+if HTMLParser is not None:
+    BACKENDS['selectolax'] = SelectolaxBackend()
+
+# Backend used by the functions below: the fastest one installed
+backend = BACKENDS.get('selectolax') or BACKENDS.get('lxml') or BACKENDS['html.parser']
+
+
+def set_parser_backend(name):
+    '''
+    This function selects the parser backend by name: 'selectolax', 'lxml'
+    or 'html.parser'. The latter is always available as the fallback.
+    '''
+    global backend
+    if name not in BACKENDS:
+        raise ValueError(f"Parser backend {name!r} is not installed, choose from {list(BACKENDS)}")
+    backend = BACKENDS[name]
+    return backend
+
+
+def parse_result_page(content, url):
+    '''
+    This function parses the content of a result page once and returns its
+    job cards, page counter and next-page link together as a ResultPage.
+    '''
+    return backend.parse_result_page(content, url)
+
+
+def parse_description(content):
+    '''
+    This function pulls the job description out of the content of a
+    job posting page, or returns 'error' if the page has none.
+    '''
+    return backend.parse_description(content)
+
+
+def job_description(url):
+    '''
+    This function downloads a job posting and returns its description,
+    or 'error' if the page has none.
+    '''
+    response = MVP_fetch.get(url)
+    print("Status Code: ", response.status_code)
+    return parse_description(response.content)
+
+
+def result_pages_indeed(first_page_url, max_page=35, start_page=1):
+    '''
+    This function downloads the result pages of a job search one after another,
+    each of them exactly once, and yields them as ResultPage objects.
+    It stops after `max_page` pages, on a page without a next page, or when
+    Indeed answers with a page number other than the one asked for
+    (Indeed repeats the last page for offsets past the end).
+
+    Parameters
+    ----------
+    first_page_url : str
+        The URL of the first page, see `first_page_url_indeed`.
+    max_page : int, default 35
+        The maximum number of pages to download.
+    start_page : int, default 1
+        The page number of `first_page_url`, to pick up a crawl in the middle.
+
+    Yields
+    ------
+    page : ResultPage
+    '''
+    url = first_page_url
+    counter = start_page
+    while url is not None and counter <= max_page:
+        response = MVP_fetch.get(url)
+        print("Status code of the request: ", response.status_code)
+        page = parse_result_page(response.content, url)
+        if page.page_num != counter:
+            break
+        yield page
+        counter = counter + 1
+        url = page.next_url
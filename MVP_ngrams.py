@@ -0,0 +1,76 @@
+######################## Introduction ###########################
+'''
+This py file holds the n-gram counter of the exploration modules. The
+prepared job descriptions are streamed one at a time, every n-gram gets an
+integer id the first time it is seen, and the counts are kept as a scipy
+sparse document x n-gram matrix, so no n-gram spans two descriptions:
+
+    counter = MVP_ngrams.NgramCounter(max_len=3)
+    counts = counter.fit_transform(df.clean)    # sparse doc x n-gram counts
+    frequency = counter.frequency(counts)       # corpus totals, most frequent first
+'''
+###################### Import Libraries #########################
+'''General Libraries'''
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+'''Counting Libraries'''
+import itertools
+from collections import Counter
+
+###################### N-gram Counter ###########################
+
+class NgramCounter:
+    '''
+    This class counts the 1- to `max_len`-grams of documents.
+
+    Parameters
+    ----------
+    max_len : int, default 3
+        The longest n-gram counted.
+    '''
+    def __init__(self, max_len=3):
+        self.max_len = max_len
+        # Id of every n-gram seen, in the order the n-grams were first seen
+        self.ids = {}
+
+    @property
+    def ngrams(self):
+        '''
+        The n-grams in the order of their ids.
+        '''
+        return list(self.ids)
+
+    def document_ngrams(self, tokens):
+        '''
+        This function returns an iterator over the n-grams of the tokens of one document.
+        '''
+        return itertools.chain.from_iterable(map(' '.join, zip(*[tokens[i:] for i in range(n)]))
+                                             for n in range(1, self.max_len + 1))
+
+    def fit_transform(self, texts):
+        '''
+        This function counts the n-grams of the texts and returns the scipy
+        sparse (CSR) matrix of their counts, one row per text and one column
+        per n-gram id.
+        '''
+        ids = self.ids
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            counts = Counter(self.document_ngrams(str(text).split()))
+            # Give every new n-gram the next id
+            indices.extend([ids.setdefault(ngram, len(ids)) for ngram in counts])
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix((np.array(data, dtype=np.int32), np.array(indices, dtype=np.int32), indptr),
+                                 shape=(len(indptr) - 1, len(ids)))
+
+    def frequency(self, matrix):
+        '''
+        This function returns the corpus totals of the n-grams of a count
+        matrix, most frequent first, like pandas value_counts.
+        '''
+        totals = np.asarray(matrix.sum(axis=0)).ravel()
+        frequency = pd.Series(totals, index=self.ngrams[:matrix.shape[1]], name='count')
+        return frequency.sort_values(ascending=False, kind='stable')
@@ -22,15 +22,18 @@ import re
 
 '''NLP Libraries'''
 import unicodedata
-import nltk
 from nltk.tokenize.toktok import ToktokTokenizer
-from nltk.corpus import stopwords
 
 '''Time-related Libraries'''
 import time
 from datetime import date
 import datetime
 
+'''Job Post Store, Text Pipeline and Skill Cube'''
+import MVP_store
+import MVP_text
+import MVP_cube
+
 ################################################### Text Preparation Functions ###############################################
 def basic_clean(string):
     '''
@@ -50,13 +53,8 @@ def tokenize(string):
     This function takes in a string and
     returns a tokenized string.
     '''
-    # Create tokenizer.
-    tokenizer = nltk.tokenize.ToktokTokenizer()
-    
-    # Use tokenizer
-    string = tokenizer.tokenize(string, return_str=True)
-    
-    return string
+    # Use the tokenizer built once by the shared pipeline
+    return MVP_text.pipeline().tokenize(string)
 
 ################ Prepare Stem Function ####################
 
@@ -65,16 +63,8 @@ def stem(string):
     This function takes in a string and
     returns a string with words stemmed.
     '''
-    # Create porter stemmer.
-    ps = nltk.porter.PorterStemmer()
-    
-    # Use the stemmer to stem each word in the list of words we created by using split.
-    stems = [ps.stem(word) for word in string.split()]
-    
-    # Join our lists of words into a string again and assign to a variable.
-    string = ' '.join(stems)
-    
-    return string
+    # Use the porter stemmer built once by the shared pipeline
+    return MVP_text.pipeline().stem(string)
 
 ################ Prepare Lemmatize Function ###############
 
@@ -83,16 +73,8 @@ def lemmatize(string):
     This function takes in string for and
     returns a string with words lemmatized.
     '''
-    # Create the lemmatizer.
-    wnl = nltk.stem.WordNetLemmatizer()
-    
-    # Use the lemmatizer on each word in the list of words we created by using split.
-    lemmas = [wnl.lemmatize(word) for word in string.split()]
-    
-    # Join our list of words into a string again and assign to a variable.
-    string = ' '.join(lemmas)
-    
-    return string
+    # Use the lemmatizer built once by the shared pipeline
+    return MVP_text.pipeline().lemmatize(string)
 
 ############ Prepare Remove Stopwords Function ############
 
@@ -101,101 +83,87 @@ def remove_stopwords(string, extra_words=[], exclude_words=[]):
     This function takes in a string, optional extra_words and exclude_words parameters
     with default empty lists and returns a string.
     '''
-    # Create stopword_list.
-    stopword_list = stopwords.words('english')
-    
-    # Remove additional exclude_words.
-    stopword_list.extend(exclude_words)
-    
-    # Split words in string.
-    words = string.split()
-    
-    # Create a list of words from my string with stopwords removed and assign to variable.
-    filtered_words = [word for word in words if word not in stopword_list]
-    
-    # Add additional extra_words.
-    filtered_words.extend(extra_words)
-    
-    # Join words in the list back into strings and assign to a variable.
-    string_without_stopwords = ' '.join(filtered_words)
-    
-    return string_without_stopwords
+    # Look the words up in the stopword set of the pipeline of these words
+    return MVP_text.pipeline(extra_words, exclude_words).remove_stopwords(string)
 
 ############ Prepare Job Description Function ############
 
-def prep_job_description_data(df, column, extra_words=[], exclude_words=[]):
+def prep_job_description_data(df, column, extra_words=[], exclude_words=[], 
+                              outputs=['clean', 'tokenized', 'stemmed', 'lemmatized'], processes=1, 
+                              cache=None):
     '''
     This function take in a df and the string name for a text column with 
     option to pass lists for extra_words and exclude_words and
     returns a df with the text article title, original text, stemmed text,
     lemmatized text, cleaned, tokenized, & lemmatized text with stopwords removed.
+    Only the columns listed in `outputs` are computed, cleaning and
+    tokenizing every text once. With `processes` > 1 the column is prepared
+    in chunks by a pool of worker processes. With a MVP_text.TextCache the
+    outputs of a description already prepared are read from the cache.
     '''
-    df['clean'] = df[column].apply(basic_clean)\
-                            .apply(tokenize)\
-                            .apply(remove_stopwords, 
-                                   extra_words=extra_words, 
-                                   exclude_words=exclude_words)\
-                            .apply(lemmatize)
-    df['tokenized'] = df[column].apply(basic_clean).apply(tokenize)
-    df['stemmed'] = df[column].apply(basic_clean).apply(stem)
-    df['lemmatized'] = df[column].apply(basic_clean).apply(lemmatize)
+    # Build the NLTK models and the stopword set once for the whole column
+    pipeline = MVP_text.pipeline(extra_words, exclude_words)
+    # Prepare the columns in one pass, over the descriptions not in the cache
+    if cache is not None:
+        prepared = cache.process(pipeline, df[column], outputs=outputs, processes=processes)
+    else:
+        prepared = pipeline.process(df[column], outputs=outputs, processes=processes)
+    for output in outputs:
+        df[output] = prepared[output]
     return df
 
 ################################################### Job Preparation Functions ###############################################
-def compute_post_date(df):
+def compute_post_date(df, reference_date=None):
     '''
     This function computes the date of the job post based on post age
     and set the date as the index of the dataframe.
-    '''
-    # Create an empty list to hold the post date
-    post_date = []
-    # Create a variable to store today's date
-    today = datetime.date.today()
-    # For loop the column post_age and convert the values to date
-    for age in df.post_age:
-        if age.isin(['Just posted', 'Today']):
-            post_date.append(today)
-        else:
-            # Extract the number
-            num = re.findall(r'(\d+)', age)[0]
-            # Cast the string number to integer
-            num = int(num)
-            # Convert the integer to timedelta object
-            num = datetime.timedelta(days=num)
-            # Compute post date
-            date = today - num
-            post_date.append(date)
-    # Add post date as new column
-    df['date'] = post_date
-    # Set the column post_date as the index and sort the values
-    df = df.set_index('date').sort_index(ascending=False)
-    return df
 
+    Parameters
+    ----------
+    df : DataFrame
+        Job posts with a post_age column, e.g. 'Just posted', 'Today',
+        '1 day ago' or '30+ days ago'.
+    reference_date : date or str, default None
+        The day the job posts were acquired. Defaults to today.
 
-def remove_duplicates(df):
-    '''
-    This function removes the duplicates in the dataframe
+    Returns
+    -------
+    df : DataFrame
+        The job posts indexed by post date, most recent first.
     '''
-    # Define the columns for identifying duplicates
-    columns = ['title', 'location', 'company', 'job_link', 'job_description']
-    # Drop the duplicates except for the last occurrence
-    df.drop_duplicates(subset=columns, inplace=True, keep='last')
+    # The day the post ages are counted from
+    if reference_date is None:
+        reference_date = datetime.date.today()
+    reference_date = pd.Timestamp(reference_date).normalize()
+    # Parse each distinct post age once: there are only a few dozen of them.
+    # A missing post age becomes '' so it gets a code of its own and no date
+    codes, ages = pd.factorize(df.post_age.fillna('').astype(str))
+    ages = pd.Series(ages)
+    # Extract the number of days of the post ages at once
+    days = pd.to_numeric(ages.str.extract(r'(\d+)', expand=False))
+    # Job posts of the reference day have no number
+    days = days.mask(ages.isin(['Just posted', 'Today']), 0).to_numpy()
+    # Compute post date
+    df['date'] = reference_date - pd.to_timedelta(days[codes], unit='D')
+    # Set the column post_date as the index and sort the values
+    df = df.set_index('date').sort_index(ascending=False)
     return df
 
 
 def daily_update_ds():
     '''
     This function updates job posts of data scientist in TX by adding the daily acquring
-    of data scientist job posts in TX. 
+    of data scientist job posts in TX. The job posts are kept in the date-partitioned
+    store `df_ds_tx/`; only the files of the new job posts are uploaded to S3.
     '''
-    # Read the job posts of data scientist in TX
-    download_from_S3_bucket()
-    df_ds_tx = pd.read_csv("df_ds_tx.csv")
-    num_jobs = df_ds_tx.shape[0]
-    # Convert the date column to datetime type
-    df_ds_tx.date = pd.to_datetime(df_ds_tx.date)
-    # Set the date column as the index and sort the index
-    df_ds_tx = df_ds_tx.set_index('date').sort_index(ascending=False)
+    # Fetch the files of the store that are not local yet
+    store = MVP_store.PartitionedStore('df_ds_tx', bucket='dsrawjobpostings')
+    store.download()
+    # Move the master CSV file into the store the first time
+    if not store.files():
+        download_from_S3_bucket()
+        if not store.upload(store.import_csv("df_ds_tx.csv", date.today())):
+            print("Upload of the imported job posts failed, retried by the next update")
     
     # Get current date
     today = date.today()
@@ -204,20 +172,21 @@ def daily_update_ds():
     # Name of file to be uploaded to S3 bucket, `dsrawjobpostings`
     file_name = "ds_tx_indeed_" + today + ".csv"
     
-    df = pd.read_csv(file_name, index_col=0)
-    
-    # Add the daily update
-    df = compute_post_date(df)
-    df_ds_tx = pd.concat([df_ds_tx, df]).sort_index(ascending=False)
-    # Remove the duplicates
-    df_ds_tx = remove_duplicates(df_ds_tx)
-    # Save as csv file
-    df_ds_tx.to_csv("df_ds_tx.csv")
-    # Upload the updated data science job postings to S3
-    upload_to_S3_bucket("df_ds_tx.csv", bucket='dsrawjobpostings', object_name=None)
-    # Print the new jobs posted today
-    num_new_jobs = df_ds_tx.shape[0] - num_jobs
-    print("New Jobs Posted Today: ", num_new_jobs)
+    df = pd.read_csv(file_name, index_col=0) # Add `index_col=0` to prevent from `Unnamed:0` bug
+    
+    # Add the daily update: only the job posts not in the store yet are written
+    df = compute_post_date(df).reset_index()
+    new_files, num_new_jobs = store.append(df, date.today())
+    # Upload the new files to S3
+    if store.upload(new_files):
+        # Print the new jobs posted today
+        print("New Jobs Posted Today: ", num_new_jobs)
+    else:
+        print("Upload of the new job posts failed, retried by the next update")
+    # Return all the job posts with the date as the index
+    df_ds_tx = store.read()
+    df_ds_tx.date = pd.to_datetime(df_ds_tx.date)
+    df_ds_tx = df_ds_tx.set_index('date').sort_index(ascending=False)
     return df_ds_tx
 
 
@@ -322,7 +291,7 @@ def prepare_job_posts_indeed():
     The function cleans the csv file of data scientist job posts and save as json.
     '''
     # Read the job posts of data scientist in TX
-    df = pd.read_csv("df_ds_tx.csv")
+    df = MVP_store.PartitionedStore('df_ds_tx').read()
     # Create columns of city, state, and zipcode
     location = df.location.str.split(', ', expand=True)
     location.columns = ['city', 'zipcode']
@@ -339,15 +308,20 @@ def prepare_job_posts_indeed():
     # Replace the missing values in the company rating with 0
     df.company_rating = df.company_rating.apply(lambda i: 0 if i == 'missing' else i)
     # Clean the text in the job description
-    df = prep_job_description_data(df, 'job_description')
+    # Only the descriptions not prepared on an earlier day go through the pipeline
+    cache = MVP_text.TextCache('df_ds_tx_clean.sqlite')
+    df = prep_job_description_data(df, 'job_description', outputs=['clean'], cache=cache)
+    cache.close()
     # Clean the job title
     df.title = df.title.apply(clean_job_title)
     # Drop the redundant columns post_age and location
-    redundant_cols = ['post_age', 'location', 'tokenized', 'stemmed', 'lemmatized']
+    redundant_cols = ['post_age', 'location']
     df = df.drop(columns=redundant_cols)
     # Alther the data type of company_rating and zipcode
     df.company_rating = df.company_rating.apply(lambda i: float(i))
     df.zipcode = df.zipcode.apply(lambda i: int(i))
+    # Add the job posts not in the skill cube yet to the time series of the dashboard
+    MVP_cube.SkillCube('skill_cube').update('ds', df)
     # Save a JSON version of the prepared data
     df.to_json('df_ds_tx_prepared.json', orient='records')
     return df
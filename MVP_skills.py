@@ -0,0 +1,107 @@
+######################## Introduction ###########################
+'''
+This py file holds the skill matcher shared by the exploration modules.
+A whole skill library (library.library_ds_tech, library.library_wd_general,
+...) is compiled once into a trie over tokens, and every prepared job
+description is scanned once for all the skills at the same time:
+
+    matcher = MVP_skills.SkillMatcher(library.library_ds_tech)
+    counts = matcher.matrix(df.clean)        # sparse doc x skill counts
+'''
+###################### Import Libraries #########################
+'''General Libraries'''
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+'''Caching Library'''
+import functools
+
+###################### Skill Matcher ############################
+
+class SkillMatcher:
+    '''
+    This class counts the skills of a library in texts. A skill is found
+    wherever its words appear as consecutive tokens of a text, including at
+    the start and the end of the text; overlapping skills ('neural networks'
+    inside 'deep neural networks') are all counted.
+
+    Parameters
+    ----------
+    library : list of str
+        The skills. Repeated skills are counted once.
+    '''
+    def __init__(self, library):
+        # Keep the first occurrence of every skill, in the order of the library
+        self.skills = list(dict.fromkeys(library))
+        # Trie over tokens: children[node] maps a token to the next node,
+        # skill_ids[node] is the skill ending at the node, or -1
+        self.children = [{}]
+        self.skill_ids = [-1]
+        self.max_tokens = 0
+        for skill_id, skill in enumerate(self.skills):
+            node = 0
+            tokens = skill.split()
+            for token in tokens:
+                if token not in self.children[node]:
+                    self.children[node][token] = len(self.children)
+                    self.children.append({})
+                    self.skill_ids.append(-1)
+                node = self.children[node][token]
+            self.skill_ids[node] = skill_id
+            self.max_tokens = max(self.max_tokens, len(tokens))
+
+    def find(self, tokens):
+        '''
+        This function returns the ids of the skills found in a list of tokens,
+        one id per occurrence.
+        '''
+        found = []
+        children, skill_ids = self.children, self.skill_ids
+        root = children[0]
+        for start in range(len(tokens)):
+            # Most tokens start no skill at all
+            node = root.get(tokens[start])
+            position = start + 1
+            while node is not None:
+                if skill_ids[node] >= 0:
+                    found.append(skill_ids[node])
+                if position == len(tokens):
+                    break
+                node = children[node].get(tokens[position])
+                position = position + 1
+        return found
+
+    def matrix(self, texts):
+        '''
+        This function returns the scipy sparse (CSR) matrix of the counts of
+        the skills (columns, in the order of `skills`) in the texts (rows).
+        '''
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            ids, counts = np.unique(self.find(str(text).split()), return_counts=True)
+            indices.extend(ids)
+            data.extend(counts)
+            indptr.append(len(indices))
+        return sparse.csr_matrix((np.array(data, dtype=np.int32), np.array(indices, dtype=np.int32), indptr),
+                                 shape=(len(indptr) - 1, len(self.skills)))
+
+    def frame(self, texts, index=None):
+        '''
+        This function returns the counts of the skills in the texts as a
+        dataframe with one column per skill.
+        '''
+        return pd.DataFrame(self.matrix(texts).toarray(), columns=self.skills, index=index)
+
+
+@functools.lru_cache(maxsize=32)
+def cached_matcher(library):
+    return SkillMatcher(library)
+
+
+def skill_matcher(library):
+    '''
+    This function returns the matcher of a library, compiled on first use
+    and reused afterwards.
+    '''
+    return cached_matcher(tuple(library))
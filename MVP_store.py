@@ -0,0 +1,408 @@
+######################## Introduction ###########################
+'''
+This py file holds the date-partitioned Parquet store of the job posts,
+which replaces the master CSV files df_ds_tx.csv and df_wd_tx.csv. Every
+daily update only adds new files to the store, so only those files are
+uploaded to AWS S3.
+
+Layout of a store rooted at df_ds_tx/ (and of its copy in the S3 bucket):
+
+    df_ds_tx/date=2021-01-05/part-20210107-0.parquet
+    df_ds_tx/date=2021-01-06/part-20210107-0.parquet
+    df_ds_tx/date=unknown/part-20210107-0.parquet   (post age not parsed)
+    df_ds_tx/fingerprints.npy
+    df_ds_tx/minhash.npy            (near-duplicate detection only)
+
+`date` is the post date and 20210107 the day the rows were added.
+`pending_uploads.txt` (local only) lists the files a failed upload left
+behind; the next upload sends them first.
+`fingerprints.npy` is the index of the 64-bit fingerprints of the job posts
+in the store: new job posts are checked against it without reading or
+hashing the history again.
+'''
+###################### Import Libraries #########################
+'''General Libraries'''
+import numpy as np
+import pandas as pd
+
+'''File Libraries'''
+import glob
+import os
+
+'''Hashing Libraries'''
+import hashlib
+import zlib
+
+'''AWS S3 Libraries'''
+import logging
+import boto3
+from boto3.exceptions import S3UploadFailedError
+from botocore.exceptions import ClientError
+
+'''Shared Indeed Parser'''
+import MVP_indeed
+
+###################### Fingerprints #############################
+
+# Fields identifying a job post
+KEY_COLUMNS = ['title', 'location', 'company', 'job_link', 'job_description']
+
+
+def normalize_text(column):
+    '''
+    This function returns a text column in canonical form: unicode NFKC,
+    lower case and runs of whitespace collapsed to one space.
+    '''
+    column = column.fillna('').astype(str).str.normalize('NFKC').str.lower()
+    return column.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def fingerprints(df):
+    '''
+    This function returns the 64-bit fingerprint of every job post of a
+    dataframe: the blake2b hash of its normalized title, location, company,
+    job link (reduced to its job key, so tracking parameters do not count)
+    and job description.
+    '''
+    fields = [normalize_text(df[column]) for column in KEY_COLUMNS if column != 'job_link']
+    fields.insert(3, df.job_link.fillna('').astype(str).map(MVP_indeed.job_key))
+    keys = fields[0].str.cat(fields[1:], sep='\x1f')
+    digests = [hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest() for key in keys]
+    return pd.Series(np.frombuffer(b''.join(digests), dtype='<u8'), index=df.index, name='fingerprint')
+
+
+def save_array(path, array):
+    '''
+    This function saves a numpy array through a temporary file, so a crash
+    never leaves a half-written index behind.
+    '''
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, array)
+    os.replace(path + '.tmp', path)
+
+
+class FingerprintIndex:
+    '''
+    This class keeps the fingerprints of the job posts of a store as a sorted
+    array in a .npy file. Checking n new job posts against it costs
+    O(n log N), whatever the size N of the history.
+    '''
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            self.fingerprints = np.load(path)
+        else:
+            self.fingerprints = np.empty(0, dtype='<u8')
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def contains(self, fingerprints):
+        '''
+        This function returns a boolean array telling which fingerprints are in the index.
+        '''
+        fingerprints = np.asarray(fingerprints, dtype='<u8')
+        if len(self.fingerprints) == 0:
+            return np.zeros(len(fingerprints), dtype=bool)
+        positions = np.searchsorted(self.fingerprints, fingerprints)
+        positions = np.minimum(positions, len(self.fingerprints) - 1)
+        return self.fingerprints[positions] == fingerprints
+
+    def add(self, fingerprints):
+        '''
+        This function adds fingerprints to the index and saves it.
+        '''
+        self.fingerprints = np.union1d(self.fingerprints, np.asarray(fingerprints, dtype='<u8'))
+        save_array(self.path, self.fingerprints)
+
+###################### Near Duplicates ##########################
+
+class MinHashIndex:
+    '''
+    This class finds job posts whose description is nearly the same as one
+    already seen (reposts with a changed date line or boilerplate), as an
+    optional second stage after the exact fingerprints. Descriptions are
+    reduced to MinHash signatures over their word shingles; signatures that
+    share a band are compared and a post is a near duplicate when the
+    estimated Jaccard similarity reaches `threshold`. Signatures are kept in
+    a .npy file next to the fingerprint index.
+
+    Parameters
+    ----------
+    path : str
+        The .npy file holding the signatures.
+    threshold : float, default 0.9
+        Minimum estimated Jaccard similarity of two near duplicates.
+    num_perm : int, default 64
+        Number of hash functions of a signature.
+    bands : int, default 16
+        Number of bands of the locality-sensitive hashing; must divide num_perm.
+    shingle : int, default 5
+        Number of words of a shingle.
+    '''
+    # Mersenne prime of the universal hash functions
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, path, threshold=0.9, num_perm=64, bands=16, shingle=5):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle = shingle
+        # The same hash functions in every run, so stored signatures stay comparable
+        rng = np.random.RandomState(2021)
+        self.a = rng.randint(1, 2**31, size=num_perm).astype('<u8')
+        self.b = rng.randint(0, 2**31, size=num_perm).astype('<u8')
+        if os.path.exists(path):
+            self.signatures = np.load(path)
+        else:
+            self.signatures = np.empty((0, num_perm), dtype='<u8')
+        # Sorted band hashes of the stored signatures, built the first time a band is queried
+        self.band_index = [None] * bands
+        # Signatures added since the last stack, and their band hashes
+        self.new_signatures = []
+        self.new_buckets = [{} for band in range(bands)]
+
+    def signature(self, text):
+        '''
+        This function returns the MinHash signature of a text.
+        '''
+        words = str(text).lower().split()
+        shingles = {' '.join(words[i:i + self.shingle])
+                    for i in range(max(len(words) - self.shingle + 1, 1))}
+        x = np.array([zlib.crc32(s.encode('utf-8')) for s in shingles], dtype='<u8')
+        return ((np.outer(self.a, x) + self.b[:, None]) % self.PRIME).min(axis=1)
+
+    def band_hashes(self, signatures, band=slice(None)):
+        '''
+        This function returns the 64-bit hash of every band of a 2-d array of
+        signatures, or of one band. Two signatures sharing a band share its hash;
+        the rare hash collisions only add candidates that are then compared.
+        '''
+        rows = signatures.shape[0]
+        hashes = np.zeros((rows, self.bands), dtype='<u8')[:, band]
+        # Value j of band i is at position i + j * bands of a signature
+        for j in range(self.num_perm // self.bands):
+            values = signatures[:, j * self.bands:(j + 1) * self.bands][:, band]
+            hashes = (hashes * np.uint64(1099511628211)) ^ values
+        return hashes
+
+    def stored_rows(self, band, key):
+        '''
+        This function returns the rows of the stored signatures whose band
+        `band` hashes to `key`.
+        '''
+        if self.band_index[band] is None:
+            hashes = self.band_hashes(self.signatures, band)
+            order = np.argsort(hashes, kind='stable')
+            self.band_index[band] = (hashes[order], order)
+        hashes, order = self.band_index[band]
+        return order[np.searchsorted(hashes, key, 'left'):np.searchsorted(hashes, key, 'right')]
+
+    def row_signature(self, row):
+        if row < len(self.signatures):
+            return self.signatures[row]
+        return self.new_signatures[row - len(self.signatures)]
+
+    def near_duplicate(self, signature, keys):
+        '''
+        This function returns True if a signature, whose band hashes are `keys`,
+        is nearly the same as one in the index.
+        '''
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(self.stored_rows(band, key).tolist())
+            candidates.update(self.new_buckets[band].get(key, []))
+        return any((self.row_signature(row) == signature).mean() >= self.threshold
+                   for row in candidates)
+
+    def filter(self, descriptions):
+        '''
+        This function returns a boolean array telling which descriptions are
+        new, adding their signatures to the index. A description nearly the
+        same as an earlier one of the same batch is not new either.
+        '''
+        keep = []
+        for text in descriptions:
+            signature = self.signature(text)
+            keys = self.band_hashes(signature[None, :])[0]
+            new = not self.near_duplicate(signature, keys)
+            if new:
+                row = len(self.signatures) + len(self.new_signatures)
+                self.new_signatures.append(signature)
+                for bucket, key in zip(self.new_buckets, keys):
+                    bucket.setdefault(key, []).append(row)
+            keep.append(new)
+        # Stack the new signatures once
+        if self.new_signatures:
+            self.signatures = np.vstack([self.signatures, np.array(self.new_signatures, dtype='<u8')])
+            self.band_index = [None] * self.bands
+            self.new_signatures = []
+            self.new_buckets = [{} for band in range(self.bands)]
+        return np.array(keep, dtype=bool)
+
+    def save(self):
+        save_array(self.path, self.signatures)
+
+###################### Partitioned Store ########################
+
+class PartitionedStore:
+    '''
+    This class keeps the job posts as Parquet files partitioned by post date.
+    Every file carries a `fingerprint` column and the fingerprints of all the
+    files form the index new job posts are deduplicated against.
+
+    Parameters
+    ----------
+    root : str
+        The local directory of the store, e.g. 'df_ds_tx'. Also the
+        prefix of the store in the bucket.
+    bucket : str, default None
+        The AWS S3 bucket holding the store, e.g. 'dsrawjobpostings'.
+    near_duplicates : bool, default False
+        Also drop job posts whose description is nearly the same as one
+        in the store (see MinHashIndex).
+    '''
+    def __init__(self, root, bucket=None, near_duplicates=False):
+        self.root = root
+        self.bucket = bucket
+        self.near_duplicates = near_duplicates
+        self.index_file = os.path.join(root, 'fingerprints.npy')
+        self.minhash_file = os.path.join(root, 'minhash.npy')
+        self.pending_file = os.path.join(root, 'pending_uploads.txt')
+
+    def files(self):
+        '''
+        This function returns the Parquet files of the store.
+        '''
+        return sorted(glob.glob(os.path.join(self.root, 'date=*', '*.parquet')))
+
+    def index(self):
+        '''
+        This function returns the fingerprint index of the store, rebuilt
+        from the fingerprint column of the files if it is missing.
+        '''
+        index = FingerprintIndex(self.index_file)
+        if len(index) == 0 and self.files():
+            index.add(np.concatenate([pd.read_parquet(path, columns=['fingerprint']).fingerprint.values
+                                      for path in self.files()]))
+        return index
+
+    def job_keys(self):
+        '''
+        This function returns the set of job keys (MVP_indeed.job_key) of the
+        job posts in the store, reading only their job_link column.
+        '''
+        job_links = [pd.read_parquet(path, columns=['job_link']).job_link.dropna()
+                     for path in self.files()]
+        return set(MVP_indeed.job_key(link) for links in job_links for link in links)
+
+    def append(self, df, day):
+        '''
+        This function adds the job posts of a dataframe with a `date` column
+        (the post date) that are not in the store yet. They are written as new
+        files, one per post date, named after `day`, the day they are added.
+        Job posts without a post date go to the partition date=unknown.
+
+        Returns
+        -------
+        new_files : list of str
+            The files written, index files included.
+        num_new_jobs : int
+            The number of job posts added.
+        '''
+        os.makedirs(self.root, exist_ok=True)
+        df = df.assign(date=pd.to_datetime(df.date).dt.strftime('%Y-%m-%d'),
+                       fingerprint=fingerprints(df))
+        # Put the date first, like the index column of the master CSV file
+        df = df[['date'] + [column for column in df.columns if column != 'date']]
+        # Keep the job posts that are neither in the store nor earlier in the dataframe
+        index = self.index()
+        df = df[~index.contains(df.fingerprint.values)].drop_duplicates(subset='fingerprint')
+        new_files = []
+        if self.near_duplicates:
+            minhash = MinHashIndex(self.minhash_file)
+            df = df[minhash.filter(df.job_description)]
+            minhash.save()
+            new_files.append(self.minhash_file)
+        # Keep the job posts whose post age could not be parsed as well
+        for post_date, df_partition in df.groupby('date', dropna=False):
+            if pd.isna(post_date):
+                post_date = 'unknown'
+            directory = os.path.join(self.root, f'date={post_date}')
+            os.makedirs(directory, exist_ok=True)
+            # Several updates on the same day each get their own file
+            n = 0
+            while os.path.exists(os.path.join(directory, f"part-{day:%Y%m%d}-{n}.parquet")):
+                n = n + 1
+            path = os.path.join(directory, f"part-{day:%Y%m%d}-{n}.parquet")
+            df_partition.to_parquet(path, index=False)
+            new_files.append(path)
+        index.add(df.fingerprint.values)
+        new_files.append(self.index_file)
+        return new_files, df.shape[0]
+
+    def read(self, fingerprints=False):
+        '''
+        This function returns all the job posts of the store as one dataframe
+        with the same columns as the master CSV file; `fingerprints=True`
+        keeps the fingerprint column.
+        '''
+        frames = [pd.read_parquet(path) for path in self.files()]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        if not fingerprints:
+            df = df.drop(columns=['fingerprint'])
+        return df
+
+    def download(self):
+        '''
+        This function downloads the files of the bucket that are not in the
+        local store yet, and the index files, which change with every update.
+        '''
+        s3 = boto3.client('s3')
+        local = set(self.files())
+        paginator = s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.root + '/'):
+            for obj in page.get('Contents', []):
+                path = os.path.join(*obj['Key'].split('/'))
+                if path not in local:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    s3.download_file(self.bucket, obj['Key'], path)
+
+    def upload(self, files):
+        '''
+        This function uploads files of the store to the bucket, after the
+        files an earlier upload failed to send. Returns True if all of them
+        were uploaded, else False; the files not uploaded are then kept in
+        `pending_uploads.txt` for the next upload.
+        '''
+        pending = []
+        if os.path.exists(self.pending_file):
+            with open(self.pending_file) as f:
+                pending = [line.strip() for line in f if line.strip()]
+        # Upload every file once, in order
+        files = list(dict.fromkeys(pending + list(files)))
+        s3 = boto3.client('s3')
+        for n, path in enumerate(files):
+            object_name = '/'.join(os.path.normpath(path).split(os.sep))
+            try:
+                s3.upload_file(path, self.bucket, object_name)
+            except (ClientError, S3UploadFailedError) as e:
+                logging.error(e)
+                with open(self.pending_file, 'w') as f:
+                    f.writelines(path + '\n' for path in files[n:])
+                return False
+        if os.path.exists(self.pending_file):
+            os.remove(self.pending_file)
+        return True
+
+    def import_csv(self, file_name, day):
+        '''
+        This function moves a master CSV file (e.g. df_ds_tx.csv, with a `date`
+        column) into the store and returns the files written.
+        '''
+        df = pd.read_csv(file_name)
+        new_files, num_new_jobs = self.append(df, day)
+        return new_files
@@ -0,0 +1,317 @@
+######################## Introduction ###########################
+'''
+This py file holds the text preparation pipeline shared by the prepare
+modules and the notebooks. The NLTK tokenizer, stemmer, lemmatizer and the
+stopword set are built once per pipeline instead of once per call:
+
+    pipeline = MVP_text.pipeline(extra_words=[], exclude_words=[])
+    clean = pipeline.process(df.job_description)
+'''
+###################### Import Libraries #########################
+'''Regex Library'''
+import re
+
+'''NLP Libraries'''
+import unicodedata
+import nltk
+from nltk.tokenize.toktok import ToktokTokenizer
+from nltk.corpus import stopwords
+
+'''Caching Libraries'''
+import functools
+import hashlib
+import sqlite3
+
+'''Concurrency Libraries'''
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+###################### Text Pipeline ############################
+
+# Outputs the pipeline can prepare from a text
+OUTPUTS = ('clean', 'tokenized', 'stemmed', 'lemmatized')
+
+# Bump when the steps of the pipeline change, to invalidate cached prepared texts
+PIPELINE_VERSION = 1
+
+
+def basic_clean(string):
+    '''
+    This function takes in a string and
+    returns the string normalized.
+    '''
+    string = unicodedata.normalize('NFKC', string)\
+             .encode('ascii', 'ignore')\
+             .decode('utf-8', 'ignore')
+    string = re.sub(r'[^\w\s]', '', string).lower()
+    return string
+
+
+class TextPipeline:
+    '''
+    This class cleans, tokenizes, removes stopwords from, stems and
+    lemmatizes texts with NLTK models built once.
+
+    Parameters
+    ----------
+    extra_words : list of str, default []
+        Words appended to every text once its stopwords are removed.
+    exclude_words : list of str, default []
+        Words removed from every text along with the English stopwords.
+    word_cache_size : int, default 65536
+        Number of words whose stem and lemma are remembered (least recently
+        used words are forgotten first). Descriptions reuse a small
+        vocabulary, so most words skip Porter and WordNet altogether.
+    '''
+    def __init__(self, extra_words=[], exclude_words=[], word_cache_size=2**16):
+        self.extra_words = list(extra_words)
+        self.exclude_words = list(exclude_words)
+        self.tokenizer = ToktokTokenizer()
+        self.stemmer = nltk.porter.PorterStemmer()
+        self.lemmatizer = nltk.stem.WordNetLemmatizer()
+        # Memoize the stem and the lemma of every word
+        self.stem_word = functools.lru_cache(maxsize=word_cache_size)(self.stemmer.stem)
+        self.lemmatize_word = functools.lru_cache(maxsize=word_cache_size)(self.lemmatizer.lemmatize)
+        # A set makes every stopword lookup O(1)
+        self.stopwords = frozenset(stopwords.words('english')) | frozenset(exclude_words)
+
+    basic_clean = staticmethod(basic_clean)
+
+    def version(self):
+        '''
+        This function returns a hash of everything the prepared texts depend on:
+        the extra and exclude words, the stopwords, the stemmer, the lemmatizer
+        and the NLTK version. Texts cached under another version are stale.
+        '''
+        configuration = repr((PIPELINE_VERSION, nltk.__version__, type(self.tokenizer).__name__,
+                              type(self.stemmer).__name__, type(self.lemmatizer).__name__,
+                              self.extra_words, sorted(self.stopwords)))
+        return hashlib.sha256(configuration.encode('utf-8')).hexdigest()[:16]
+
+    def word_cache_stats(self):
+        '''
+        This function returns the hits, misses, hit rate and size of the
+        stem and lemma caches.
+        '''
+        stats = {}
+        for name, function in [('stem', self.stem_word), ('lemmatize', self.lemmatize_word)]:
+            info = function.cache_info()
+            calls = info.hits + info.misses
+            stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize,
+                           'hit_rate': info.hits / calls if calls else 0.0}
+        return stats
+
+    def tokenize(self, string):
+        '''
+        This function takes in a string and
+        returns a tokenized string.
+        '''
+        return self.tokenizer.tokenize(string, return_str=True)
+
+    def stem(self, string):
+        '''
+        This function takes in a string and
+        returns a string with words stemmed.
+        '''
+        return ' '.join([self.stem_word(word) for word in string.split()])
+
+    def lemmatize(self, string):
+        '''
+        This function takes in a string and
+        returns a string with words lemmatized.
+        '''
+        return ' '.join([self.lemmatize_word(word) for word in string.split()])
+
+    def remove_stopwords(self, string):
+        '''
+        This function takes in a string and returns it without stopwords,
+        followed by the extra words.
+        '''
+        filtered_words = [word for word in string.split() if word not in self.stopwords]
+        filtered_words.extend(self.extra_words)
+        return ' '.join(filtered_words)
+
+    def clean(self, string):
+        '''
+        This function returns the cleaned, tokenized & lemmatized text
+        with stopwords removed.
+        '''
+        return self.lemmatize(self.remove_stopwords(self.tokenize(self.basic_clean(string))))
+
+    def prepare(self, text, outputs=OUTPUTS):
+        '''
+        This function cleans and tokenizes a text once and returns the
+        tuple of the requested outputs, in the order asked:
+
+        clean      : tokenized & lemmatized text with stopwords removed
+        tokenized  : tokenized text
+        stemmed    : stemmed text
+        lemmatized : lemmatized text
+        '''
+        string = self.basic_clean(text)
+        if 'clean' in outputs or 'tokenized' in outputs:
+            tokenized = self.tokenize(string)
+        prepared = {}
+        for output in outputs:
+            if output == 'clean':
+                prepared[output] = self.lemmatize(self.remove_stopwords(tokenized))
+            elif output == 'tokenized':
+                prepared[output] = tokenized
+            elif output == 'stemmed':
+                prepared[output] = self.stem(string)
+            elif output == 'lemmatized':
+                prepared[output] = self.lemmatize(string)
+            else:
+                raise ValueError(f"unknown output {output!r}, expected one of {OUTPUTS}")
+        return tuple(prepared[output] for output in outputs)
+
+    def process(self, texts, outputs=None, processes=1, chunk_size=256):
+        '''
+        This function takes in an iterable of texts and returns the list of
+        their cleaned, tokenized & lemmatized texts with stopwords removed.
+        Given a list of outputs, it returns a dictionary mapping each output
+        to its list of texts instead, every text being prepared in one pass.
+
+        With `processes` > 1 the texts are split into chunks of `chunk_size`
+        prepared by a pool of worker processes, each building its own
+        pipeline once; the results are the same as the serial ones.
+        '''
+        if processes > 1:
+            return self.process_parallel(list(texts), outputs, processes, chunk_size)
+        if outputs is None:
+            return [self.clean(text) for text in texts]
+        columns = zip(*[self.prepare(text, outputs) for text in texts])
+        return dict(zip(outputs, [list(column) for column in columns] or [[] for output in outputs]))
+
+    def process_parallel(self, texts, outputs, processes, chunk_size):
+        '''
+        This function prepares chunks of the texts in a process pool and
+        puts the results back together in the order of the texts.
+        '''
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                                 initargs=(self.extra_words, self.exclude_words)) as executor:
+            results = list(executor.map(process_chunk, chunks, itertools.repeat(outputs)))
+        if outputs is None:
+            return [text for result in results for text in result]
+        return {output: [text for result in results for text in result[output]] for output in outputs}
+
+###################### Worker Processes #########################
+
+# The pipeline of a worker process, built once by init_worker
+worker_pipeline = None
+
+
+def init_worker(extra_words, exclude_words):
+    '''
+    This function loads the NLTK models and stopwords once per worker process.
+    '''
+    global worker_pipeline
+    worker_pipeline = TextPipeline(extra_words, exclude_words)
+
+
+def process_chunk(texts, outputs):
+    '''
+    This function prepares a chunk of texts in a worker process.
+    '''
+    return worker_pipeline.process(texts, outputs)
+
+###################### Clean Text Cache #########################
+
+def text_key(text):
+    '''
+    This function returns the cache key of a text: the blake2b hash of it.
+    '''
+    return hashlib.blake2b(str(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TextCache:
+    '''
+    This class keeps the prepared texts (clean, tokenized, stemmed and
+    lemmatized) of every description already prepared in a SQLite file,
+    keyed by the hash of the description, the version of the pipeline that
+    prepared it and the output. Preparing a posting history then only runs
+    the pipeline over the descriptions it has not seen.
+
+        cache = MVP_text.TextCache('clean_texts.sqlite')
+        clean = cache.process(MVP_text.pipeline(), df.job_description)
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(path)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS prepared_texts (
+                               version TEXT, key TEXT, output TEXT, text TEXT,
+                               PRIMARY KEY (version, key, output))''')
+        self.db.commit()
+
+    def lookup(self, version, keys, output='clean'):
+        '''
+        This function returns a dictionary of the cached texts of an output of the keys.
+        '''
+        found = {}
+        keys = list(set(keys))
+        # Stay below the SQLite limit of variables per statement
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = self.db.execute(f'''SELECT key, text FROM prepared_texts WHERE version = ?
+                                       AND output = ? AND key IN ({','.join('?' * len(chunk))})''',
+                                   [version, output] + chunk)
+            found.update(rows)
+        return found
+
+    def process(self, pipeline, texts, outputs=None, processes=1):
+        '''
+        This function returns the list of the clean texts of the texts, or
+        given a list of outputs a dictionary mapping each output to its list
+        of texts, like TextPipeline.process. The pipeline only runs over the
+        texts that miss one of the outputs in the cache.
+        '''
+        texts = list(texts)
+        version = pipeline.version()
+        requested = ['clean'] if outputs is None else list(outputs)
+        keys = [text_key(text) for text in texts]
+        found = {output: self.lookup(version, keys, output) for output in requested}
+        # Prepare every missing text once, even if it shows up several times
+        missing = {key: text for key, text in zip(keys, texts)
+                   if any(key not in found[output] for output in requested)}
+        self.hits += len(texts) - sum(key in missing for key in keys)
+        self.misses += sum(key in missing for key in keys)
+        if missing:
+            prepared = pipeline.process(list(missing.values()), outputs=requested, processes=processes)
+            rows = []
+            for output in requested:
+                found[output].update(zip(missing.keys(), prepared[output]))
+                rows.extend((version, key, output, text) for key, text in zip(missing.keys(), prepared[output]))
+            self.db.executemany('INSERT OR REPLACE INTO prepared_texts VALUES (?, ?, ?, ?)', rows)
+            self.db.commit()
+        if outputs is None:
+            return [found['clean'][key] for key in keys]
+        return {output: [found[output][key] for key in keys] for output in requested}
+
+    def prune(self, pipeline):
+        '''
+        This function drops the texts cached by other versions of the pipeline,
+        and the clean texts of the first cache layout.
+        '''
+        self.db.execute('DELETE FROM prepared_texts WHERE version != ?', (pipeline.version(),))
+        self.db.execute('DROP TABLE IF EXISTS clean_texts')
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+###################### Shared Pipelines #########################
+
+@functools.lru_cache(maxsize=None)
+def cached_pipeline(extra_words, exclude_words):
+    return TextPipeline(extra_words, exclude_words)
+
+
+def pipeline(extra_words=[], exclude_words=[]):
+    '''
+    This function returns the pipeline of the given extra and exclude
+    words, built on first use and reused afterwards.
+    '''
+    return cached_pipeline(tuple(extra_words), tuple(exclude_words))
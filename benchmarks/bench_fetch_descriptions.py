@@ -0,0 +1,60 @@
+######################## Introduction ###########################
+'''
+This py file compares downloading the job descriptions of one page of job
+cards one after another against the concurrent fetch engine, using the
+local Indeed stand-in.
+
+$ python benchmarks/bench_fetch_descriptions.py
+'''
+###################### Import Libraries #########################
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import MVP_fetch
+import MVP_acquire_ds
+from indeed_standin import IndeedStandIn, job_key
+
+###################### Benchmark ################################
+
+def run(max_workers, server):
+    '''
+    This function downloads the descriptions of the first result page and
+    returns the wall time, the links and the descriptions.
+    '''
+    soup = MVP_acquire_ds.page_soup_indeed(server.base_url + '/jobs?q=data+scientist&l=tx')
+    job_cards = MVP_acquire_ds.job_cards_indeed(soup)
+    start = time.perf_counter()
+    links, descriptions = MVP_acquire_ds.job_links_and_contents_indeed(
+        job_cards, max_workers=max_workers, base_url=server.base_url)
+    return time.perf_counter() - start, links, descriptions
+
+
+if __name__ == "__main__":
+    # One card of the page has an expired posting
+    server = IndeedStandIn(cards_per_page=15, latency=0.2, missing={job_key(1, 7)}).start()
+    # A second stand-in asks for a break every 10 requests
+    throttling_server = IndeedStandIn(cards_per_page=15, latency=0.2, missing={job_key(1, 7)}, 
+                                      throttle_every=10).start()
+    # Let the stand-in take as many requests per second as it can answer
+    MVP_fetch.limiter = MVP_fetch.RateLimiter(rate=50, burst=8)
+    try:
+        serial_time, serial_links, serial_descriptions = run(1, server)
+        concurrent_time, links, descriptions = run(8, server)
+        throttled_time, _, throttled_descriptions = run(8, throttling_server)
+    finally:
+        server.stop()
+        throttling_server.stop()
+    # The concurrent engine must return the same results in the same order
+    assert links == serial_links
+    assert descriptions == serial_descriptions
+    assert descriptions[7] == 'error'
+    # Throttled requests are retried after the Retry-After period
+    assert throttled_descriptions == descriptions
+    print(f"Serial:     {serial_time:.2f}s for {len(links)} descriptions")
+    print(f"Concurrent: {concurrent_time:.2f}s for {len(links)} descriptions "
+          f"({serial_time / concurrent_time:.1f}x)")
+    print(f"Throttled:  {throttled_time:.2f}s for {len(links)} descriptions "
+          f"({throttling_server.requests_throttled} requests answered with 429)")
@@ -0,0 +1,70 @@
+######################## Introduction ###########################
+'''
+This py file compares crawling result pages of the local Indeed stand-in
+with a bare `requests.get` per request (a new TCP connection every time)
+against the pooled keep-alive session of MVP_fetch. It reports the number
+of connections opened and the wall time per crawled page.
+
+$ python benchmarks/bench_http_session.py
+'''
+###################### Import Libraries #########################
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import MVP_fetch
+import MVP_acquire_ds
+from indeed_standin import IndeedStandIn
+
+###################### Benchmark ################################
+
+class BareRequests:
+    '''
+    This class stands in for the shared session and opens a new
+    connection for every request, like the acquire modules used to.
+    '''
+    def get(self, url, timeout=None, headers=None):
+        return requests.get(url, timeout=timeout, headers=headers)
+
+
+def crawl(server, num_pages):
+    '''
+    This function crawls the result pages and the descriptions of their
+    job cards and returns the wall time.
+    '''
+    start = time.perf_counter()
+    for page in range(num_pages):
+        url = server.base_url + f'/jobs?q=data+scientist&l=tx&start={page * 10}'
+        soup = MVP_acquire_ds.page_soup_indeed(url)
+        job_cards = MVP_acquire_ds.job_cards_indeed(soup)
+        MVP_acquire_ds.job_links_and_contents_indeed(job_cards, base_url=server.base_url)
+    return time.perf_counter() - start
+
+
+def run(client, num_pages=5):
+    '''
+    This function crawls a fresh stand-in with the given client and
+    returns the wall time, connections and bytes per page.
+    '''
+    server = IndeedStandIn(num_pages=num_pages, latency=0.005).start()
+    MVP_fetch.session = client
+    try:
+        wall_time = crawl(server, num_pages)
+    finally:
+        server.stop()
+    return wall_time / num_pages, server.connections_opened / num_pages, server.bytes_sent / num_pages
+
+
+if __name__ == "__main__":
+    # Take the rate limiter out of the measurement
+    MVP_fetch.limiter = MVP_fetch.RateLimiter(rate=1000, burst=1000)
+    before = run(BareRequests())
+    after = run(MVP_fetch.make_session())
+    print("                 wall time/page   connections/page   bytes/page")
+    for name, (wall_time, connections, num_bytes) in [('bare requests', before),
+                                                      ('pooled session', after)]:
+        print(f"{name:<16} {wall_time * 1000:>11.1f} ms {connections:>18.1f} {num_bytes:>12.0f}")
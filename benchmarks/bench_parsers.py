@@ -0,0 +1,95 @@
+######################## Introduction ###########################
+'''
+This py file compares the parser backends of MVP_indeed on saved Indeed
+HTML pages: result pages go through `parse_result_page` and posting pages
+through `parse_description`. Every backend runs in a fresh process and
+reports pages per second and its peak memory.
+
+$ python benchmarks/bench_parsers.py [directory of saved pages]
+
+Saved result pages must have "jobs" in their file name, every other .html
+file is treated as a posting page. Without a directory the canned pages of
+the local Indeed stand-in are used.
+'''
+###################### Import Libraries #########################
+import glob
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import MVP_indeed
+import indeed_standin
+
+###################### Benchmark ################################
+
+def write_canned_fixtures(directory, num_pages=20):
+    '''
+    This function saves canned result and posting pages as HTML files.
+    '''
+    for page in range(1, num_pages + 1):
+        with open(os.path.join(directory, f'jobs_{page:03d}.html'), 'w') as f:
+            f.write(indeed_standin.result_page(page, 15, num_pages))
+        with open(os.path.join(directory, f'viewjob_{page:03d}.html'), 'w') as f:
+            f.write(indeed_standin.job_page(indeed_standin.job_key(page, 0)))
+
+
+def load_fixtures(directory):
+    '''
+    This function reads the saved pages and splits them into result pages and posting pages.
+    '''
+    result_pages, posting_pages = [], []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as f:
+            content = f.read()
+        if 'jobs' in os.path.basename(path):
+            result_pages.append(content)
+        else:
+            posting_pages.append(content)
+    return result_pages, posting_pages
+
+
+def measure(name, directory, repeat, queue):
+    '''
+    This function parses every saved page `repeat` times with one backend
+    and puts its pages per second, its peak memory growth in MB and its
+    output of the first pass on the queue.
+    '''
+    result_pages, posting_pages = load_fixtures(directory)
+    MVP_indeed.set_parser_backend(name)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for i in range(repeat):
+        pages = [MVP_indeed.parse_result_page(content, 'https://www.indeed.com/jobs?q=data+scientist')
+                 for content in result_pages]
+        descriptions = [MVP_indeed.parse_description(content) for content in posting_pages]
+    elapsed = time.perf_counter() - start
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+    output = [MVP_indeed.job_cards_columns(page.cards) for page in pages] + descriptions
+    queue.put((repeat * (len(result_pages) + len(posting_pages)) / elapsed, peak, output))
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as canned:
+        if len(sys.argv) > 1:
+            directory = sys.argv[1]
+        else:
+            directory = canned
+            write_canned_fixtures(directory)
+        results = {}
+        context = multiprocessing.get_context('spawn')
+        for name in MVP_indeed.BACKENDS:
+            queue = context.Queue()
+            process = context.Process(target=measure, args=(name, directory, 10, queue))
+            process.start()
+            results[name] = queue.get()
+            process.join()
+    # Every backend must extract the same fields
+    reference = results['html.parser'][2]
+    print("backend        pages/sec   peak memory   same output")
+    for name, (pages_per_second, peak, output) in results.items():
+        print(f"{name:<12} {pages_per_second:>11.0f} {peak:>10.1f} MB   {output == reference}")
@@ -0,0 +1,69 @@
+######################## Introduction ###########################
+'''
+This py file compares the vectorized `compute_post_date` of MVP_prepare_ds
+with the row-by-row loop it replaced, on a million synthetic post_age
+strings, and checks that both give the same dates.
+
+$ python benchmarks/bench_post_date.py [number of rows]
+'''
+###################### Import Libraries #########################
+import datetime
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import MVP_prepare_ds
+
+###################### Benchmark ################################
+
+def synthetic_post_ages(num_rows, seed=2021):
+    '''
+    This function returns post_age strings in the proportions Indeed shows them.
+    '''
+    rng = np.random.RandomState(seed)
+    days = rng.randint(1, 31, size=num_rows)
+    ages = np.where(days == 1, '1 day ago', [f'{d} days ago' for d in days])
+    ages = np.where(days == 30, '30+ days ago', ages)
+    ages = np.where(rng.rand(num_rows) < 0.1, 'Just posted', ages)
+    ages = np.where(rng.rand(num_rows) < 0.05, 'Today', ages)
+    return pd.DataFrame({'post_age': ages})
+
+
+def loop_post_date(df, reference_date):
+    '''
+    This function is the row-by-row loop compute_post_date used to run
+    (with its `age.isin` crash fixed), kept as the baseline.
+    '''
+    post_date = []
+    for age in df.post_age:
+        if age in ['Just posted', 'Today']:
+            post_date.append(reference_date)
+        else:
+            num = int(re.findall(r'(\d+)', age)[0])
+            post_date.append(reference_date - datetime.timedelta(days=num))
+    df['date'] = post_date
+    return df.set_index('date').sort_index(ascending=False)
+
+
+if __name__ == "__main__":
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    reference_date = datetime.date(2021, 1, 10)
+    df = synthetic_post_ages(num_rows)
+    start = time.perf_counter()
+    before = loop_post_date(df.copy(), reference_date)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    after = MVP_prepare_ds.compute_post_date(df.copy(), reference_date)
+    vectorized_time = time.perf_counter() - start
+    # Both must give the same dates
+    same = (pd.to_datetime(before.index.to_series()).sort_values().values ==
+            after.index.to_series().sort_values().values).all()
+    print(f"rows: {num_rows}")
+    print(f"loop        {loop_time:>8.2f} s")
+    print(f"vectorized  {vectorized_time:>8.2f} s   ({loop_time / vectorized_time:.0f}x)   same dates: {same}")
@@ -0,0 +1,63 @@
+######################## Introduction ###########################
+'''
+This py file appends synthetic daily job posts to a PartitionedStore of
+MVP_store in a temporary directory and checks that every job post `append`
+reports as added can be read back, including the ones without a post date.
+
+$ python benchmarks/bench_store.py [number of days] [job posts per day]
+'''
+###################### Import Libraries #########################
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import MVP_store
+
+###################### Benchmark ################################
+
+def synthetic_job_posts(num_rows, day, num_days, seed=2021):
+    '''
+    This function returns the job posts of the crawl of `day`, the
+    `num_days`-th day: many of them reposted from earlier days and about 5%
+    without a post date, like the 'error' cards whose post age cannot be parsed.
+    '''
+    rng = np.random.RandomState(seed + num_days)
+    ids = rng.randint(0, 2 * num_rows * num_days, size=num_rows)
+    dates = pd.Series(pd.Timestamp(day) - pd.to_timedelta(rng.randint(0, 30, size=num_rows), unit='D'))
+    dates[rng.rand(num_rows) < 0.05] = pd.NaT
+    return pd.DataFrame({'date': dates,
+                         'title': [f'data scientist {i % 97}' for i in ids],
+                         'location': 'Austin, TX',
+                         'company': [f'company {i % 31}' for i in ids],
+                         'company_rating': 'missing',
+                         'post_age': '1 day ago',
+                         'job_link': [f'https://www.indeed.com/rc/clk?jk={i:016x}' for i in ids],
+                         'job_description': [f'job description {i}' for i in ids]})
+
+
+if __name__ == "__main__":
+    num_days = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    num_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    with tempfile.TemporaryDirectory() as root:
+        store = MVP_store.PartitionedStore(os.path.join(root, 'df_ds_tx'))
+        num_jobs = 0
+        for n in range(num_days):
+            day = datetime.date(2021, 1, 5) + datetime.timedelta(days=n)
+            df = synthetic_job_posts(num_rows, day, n + 1)
+            start = time.perf_counter()
+            new_files, num_new_jobs = store.append(df, day)
+            append_time = time.perf_counter() - start
+            num_stored = store.read().shape[0]
+            # Every job post reported as added must be in the store
+            assert num_stored == num_jobs + num_new_jobs, (num_stored, num_jobs, num_new_jobs)
+            assert num_stored == len(store.index())
+            num_jobs = num_stored
+            print(f"day {day}   new jobs {num_new_jobs:>7}   stored {num_stored:>8}   "
+                  f"append {append_time:>6.2f} s")
@@ -0,0 +1,51 @@
+######################## Introduction ###########################
+'''
+This py file measures how the text preparation of MVP_text scales with the
+number of worker processes on a synthetic corpus of job descriptions. It
+reports docs/sec and the speedup from 1 to N processes, and checks that
+every parallel run gives the same texts as the serial one.
+
+$ python benchmarks/bench_text_scaling.py [number of docs] [max processes]
+
+The NLTK stopwords and wordnet corpora must be downloaded.
+'''
+###################### Import Libraries #########################
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import MVP_text
+
+###################### Benchmark ################################
+
+VOCABULARY = ['python', 'sql', 'machine', 'learning', 'models', 'data', 'scientist', 'experience',
+              'years', 'statistics', 'tableau', 'spark', 'aws', 'we', 'are', 'looking', 'for', 'a',
+              'the', 'and', 'to', 'with', 'in', 'of', 'teams', 'building', 'pipelines', 'analyzing',
+              'A/B', 'testing', 'C++', "you'll", 'Résumé', 'skills:', 'deep-learning', 'NLP,']
+
+
+def synthetic_corpus(num_docs, words_per_doc=400, seed=2021):
+    '''
+    This function returns job descriptions drawn from a small vocabulary.
+    '''
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(VOCABULARY) for i in range(words_per_doc)) for n in range(num_docs)]
+
+
+if __name__ == "__main__":
+    num_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    docs = synthetic_corpus(num_docs)
+    pipeline = MVP_text.TextPipeline()
+    reference = None
+    print("processes    docs/sec   speedup   same output")
+    for processes in range(1, max_processes + 1):
+        start = time.perf_counter()
+        prepared = pipeline.process(docs, outputs=['clean'], processes=processes)
+        docs_per_second = num_docs / (time.perf_counter() - start)
+        if reference is None:
+            reference, serial = prepared, docs_per_second
+        print(f"{processes:>9} {docs_per_second:>11.0f} {docs_per_second / serial:>8.1f}x   {prepared == reference}")
@@ -0,0 +1,97 @@
+######################## Introduction ###########################
+'''
+This py file compares three ways of ranking the skills of a library in a
+synthetic corpus of prepared job descriptions:
+
+- legacy     : every 1-3-gram of the joined corpus as a string, value_counts,
+               then one index scan and one pd.concat per skill
+- everygram  : every 1-3-gram counted per description into a sparse matrix,
+               then one hashed lookup of the whole library
+- restricted : only the n-grams of the library counted by the skill matcher
+
+It reports the wall time and the peak memory of each, every one of them in
+a fresh process, and checks that the three rankings agree.
+
+$ python benchmarks/bench_top_skills.py [number of postings] [words per posting]
+'''
+###################### Import Libraries #########################
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+import nltk
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import MVP_explore
+import library
+
+###################### Benchmark ################################
+
+def synthetic_postings(num_postings, words_per_posting, seed=2021):
+    '''
+    This function returns prepared job descriptions mixing skills of the
+    library with filler words.
+    '''
+    rng = random.Random(seed)
+    skill_words = [word for skill in library.library_ds_general for word in skill.split()]
+    filler = [f'word{i}' for i in range(5000)]
+    words = [rng.choice(skill_words) if rng.random() < 0.2 else rng.choice(filler)
+             for i in range(num_postings * words_per_posting)]
+    clean = [' '.join(words[i:i + words_per_posting]) for i in range(0, len(words), words_per_posting)]
+    return pd.DataFrame({'clean': clean})
+
+
+def legacy_ranking(df, skills):
+    '''
+    This function is the ranking top_skills used to compute, kept as the baseline.
+    '''
+    grams = list(nltk.everygrams(' '.join(df.clean).split(), max_len=3))
+    everygram = pd.Series([' '.join(gram) for gram in grams]).value_counts()
+    df_skills = pd.DataFrame()
+    for skill in skills:
+        df_skills = pd.concat([df_skills, everygram[everygram.index == skill]])
+    return df_skills.iloc[:, 0].sort_values(ascending=False, kind='stable')
+
+
+def measure(name, num_postings, words_per_posting, queue):
+    '''
+    This function ranks the skills one way and puts its wall time, its peak
+    memory growth in MB and its ranking on the queue.
+    '''
+    df = synthetic_postings(num_postings, words_per_posting)
+    skills = list(dict.fromkeys(library.library_ds_general))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if name == 'legacy':
+        ranking = legacy_ranking(df, skills)
+    else:
+        ranking = MVP_explore.skill_frequency(df, skills, restricted=(name == 'restricted'))
+    elapsed = time.perf_counter() - start
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+    queue.put((elapsed, peak, ranking.to_dict()))
+
+
+if __name__ == "__main__":
+    num_postings = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    words_per_posting = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for name in ['legacy', 'everygram', 'restricted']:
+        queue = context.Queue()
+        process = context.Process(target=measure, args=(name, num_postings, words_per_posting, queue))
+        process.start()
+        results[name] = queue.get()
+        process.join()
+    # The legacy ranking also counts n-grams spanning two postings, so compare the
+    # new rankings with each other and report how far the legacy one is off
+    reference = results['restricted'][2]
+    print(f"{num_postings} postings of {words_per_posting} words")
+    print("ranking        wall time   peak memory   same ranking   skills off")
+    for name, (elapsed, peak, ranking) in results.items():
+        off = sum(ranking.get(skill) != count for skill, count in reference.items())
+        print(f"{name:<12} {elapsed:>9.2f} s {peak:>10.0f} MB   {ranking == reference!s:>12} {off:>12}")
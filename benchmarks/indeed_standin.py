@@ -0,0 +1,197 @@
+######################## Introduction ###########################
+'''
+This py file runs a local HTTP stand-in for Indeed.com. It serves canned
+search result pages and job posting pages with the same markup the acquire
+modules parse, so the fetchers can be exercised without touching the site.
+'''
+###################### Import Libraries #########################
+import gzip
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+###################### Canned Pages #############################
+
+RESULT_PAGE = '''<html><head><title>{title} Jobs - Indeed.com</title></head>
+<body><table><tr><td id="resultsCol">
+<div id="searchCountPages">Page {page} of {num_jobs} jobs</div>
+{cards}
+<div class="pagination">{next_link}</div>
+</td></tr></table></body></html>'''
+
+JOB_CARD = '''<div class="jobsearch-SerpJobCard">
+<h2 class="title"><a href="/rc/clk?jk={jk};fccid=0">{title}</a>
+new</h2>
+<span class="company">Company {n}</span>
+<span class="ratingsContent">{rating}</span>
+<div class="location accessible-contrast-color-location">Austin, TX 7870{digit}</div>
+<span class="date">{age}</span>
+</div>'''
+
+JOB_PAGE = '''<html><head><title>{title} - Indeed.com</title></head>
+<body><div id="jobDescriptionText">{description}</div></body></html>'''
+
+MISSING_PAGE = '''<html><head><title>Job Not Found - Indeed.com</title></head>
+<body><p>This job has expired on Indeed.</p></body></html>'''
+
+POST_AGES = ['Just posted', 'Today', '1 day ago', '3 days ago', '30+ days ago']
+
+
+def job_key(page, n):
+    '''
+    This function returns the canned job key of the n-th card on a page.
+    '''
+    return f'{page:03d}{n:02d}'
+
+
+def result_page(page, cards_per_page, num_pages):
+    '''
+    This function renders the canned result page number `page` (1-based).
+    '''
+    cards = []
+    for n in range(cards_per_page):
+        cards.append(JOB_CARD.format(jk=job_key(page, n), title=f'Data Scientist {page}-{n}',
+                                     n=n, rating=f'{3 + n % 3}.{n % 10}', digit=n % 10,
+                                     age=POST_AGES[n % len(POST_AGES)]))
+    next_link = ''
+    if page < num_pages:
+        next_link = f'<a aria-label="Next" href="/jobs?q=data+scientist&amp;start={page * 10}">Next</a>'
+    return RESULT_PAGE.format(title='Data Scientist', page=page, num_jobs=num_pages * cards_per_page,
+                              cards='\n'.join(cards), next_link=next_link)
+
+
+def job_page(jk):
+    '''
+    This function renders the canned posting page of a job key.
+    '''
+    description = (f'Job {jk} is looking for a data scientist with python, sql and '
+                   'machine learning experience. ') * 20
+    return JOB_PAGE.format(title=f'Data Scientist {jk}', description=description)
+
+###################### Stand-in Server ##########################
+
+class IndeedStandIn(ThreadingHTTPServer):
+    '''
+    This class is a threaded HTTP server serving the canned Indeed pages.
+
+    Parameters
+    ----------
+    num_pages : int, default 3
+        Number of result pages. Requests past the last page get the last page,
+        the same way Indeed.com behaves.
+    cards_per_page : int, default 15
+        Number of job cards on a result page.
+    latency : float, default 0.0
+        Seconds every response is delayed by, to imitate network time.
+    missing : set of str, default None
+        Job keys whose posting page has no job description.
+    throttle_every : int, default 0
+        Answer every n-th request with 429 Too Many Requests and
+        a one second Retry-After. 0 never throttles.
+    '''
+    daemon_threads = True
+
+    def __init__(self, num_pages=3, cards_per_page=15, latency=0.0, missing=None, 
+                 throttle_every=0):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.num_pages = num_pages
+        self.cards_per_page = cards_per_page
+        self.latency = latency
+        self.missing = missing or set()
+        self.throttle_every = throttle_every
+        self.requests_served = 0
+        self.requests_throttled = 0
+        self.connections_opened = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients dropping kept-alive connections at shutdown are expected
+        pass
+
+    def process_request(self, request, client_address):
+        # Every accepted socket is a new TCP connection
+        with self.lock:
+            self.connections_opened += 1
+        super().process_request(request, client_address)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self):
+        '''
+        This function serves the pages from a background thread.
+        '''
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    '''
+    This class answers one request of the stand-in server.
+    '''
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this a kept-alive
+    # connection waits on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests_served += 1
+            throttle = server.throttle_every and server.requests_served % server.throttle_every == 0
+            if throttle:
+                server.requests_throttled += 1
+        time.sleep(server.latency)
+        if throttle:
+            self.send_body(429, b'Too Many Requests', {'Retry-After': '1'})
+            return
+        parts = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(parts.query.replace(';', '&'))
+        status = 200
+        if parts.path == '/jobs':
+            start = int(query.get('start', ['0'])[0])
+            page = min(start // 10 + 1, server.num_pages)
+            body = result_page(page, server.cards_per_page, server.num_pages)
+        elif parts.path in ('/rc/clk', '/viewjob') and 'jk' in query:
+            jk = query['jk'][0]
+            if jk in server.missing:
+                status, body = 404, MISSING_PAGE
+            else:
+                body = job_page(jk)
+        else:
+            status, body = 404, MISSING_PAGE
+        body = body.encode('utf-8')
+        # Canned pages never change, so their ETag is a hash of the content
+        etag = '"%s"' % zlib.crc32(body)
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_body(304, b'', {'ETag': etag})
+            return
+        self.send_body(status, body, {'ETag': etag})
+
+    def send_body(self, status, body, headers=None):
+        # Compress the page when the client negotiates gzip
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers = dict(headers or {}, **{'Content-Encoding': 'gzip'})
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the benchmark output readable
+        pass
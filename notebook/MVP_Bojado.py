@@ -1,8 +1,12 @@
 import re
 import unicodedata
-import nltk
 from nltk.tokenize.toktok import ToktokTokenizer
-from nltk.corpus import stopwords
+
+# Shared text pipeline at the project root
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import MVP_text
 
 ################ Prepare Basic Clean ######################
 
@@ -24,13 +28,8 @@ def tokenize(string):
     This function takes in a string and
     returns a tokenized string.
     '''
-    # Create tokenizer.
-    tokenizer = nltk.tokenize.ToktokTokenizer()
-    
-    # Use tokenizer
-    string = tokenizer.tokenize(string, return_str=True)
-    
-    return string
+    # Use the tokenizer built once by the shared pipeline
+    return MVP_text.pipeline().tokenize(string)
 
 ################ Prepare Stem Function ####################
 
@@ -39,16 +38,8 @@ def stem(string):
     This function takes in a string and
     returns a string with words stemmed.
     '''
-    # Create porter stemmer.
-    ps = nltk.porter.PorterStemmer()
-    
-    # Use the stemmer to stem each word in the list of words we created by using split.
-    stems = [ps.stem(word) for word in string.split()]
-    
-    # Join our lists of words into a string again and assign to a variable.
-    string = ' '.join(stems)
-    
-    return string
+    # Use the porter stemmer built once by the shared pipeline
+    return MVP_text.pipeline().stem(string)
 
 ################ Prepare Lemmatize Function ###############
 
@@ -57,16 +48,8 @@ def lemmatize(string):
     This function takes in string for and
     returns a string with words lemmatized.
     '''
-    # Create the lemmatizer.
-    wnl = nltk.stem.WordNetLemmatizer()
-    
-    # Use the lemmatizer on each word in the list of words we created by using split.
-    lemmas = [wnl.lemmatize(word) for word in string.split()]
-    
-    # Join our list of words into a string again and assign to a variable.
-    string = ' '.join(lemmas)
-    
-    return string
+    # Use the lemmatizer built once by the shared pipeline
+    return MVP_text.pipeline().lemmatize(string)
 
 ############ Prepare Remove Stopwords Function ############
 
@@ -75,42 +58,31 @@ def remove_stopwords(string, extra_words=[], exclude_words=[]):
     This function takes in a string, optional extra_words and exclude_words parameters
     with default empty lists and returns a string.
     '''
-    # Create stopword_list.
-    stopword_list = stopwords.words('english')
-    
-    # Remove additional exclude_words.
-    stopword_list.extend(exclude_words)
-    
-    # Split words in string.
-    words = string.split()
-    
-    # Create a list of words from my string with stopwords removed and assign to variable.
-    filtered_words = [word for word in words if word not in stopword_list]
-    
-    # Add additional extra_words.
-    filtered_words.extend(extra_words)
-    
-    # Join words in the list back into strings and assign to a variable.
-    string_without_stopwords = ' '.join(filtered_words)
-    
-    return string_without_stopwords
+    # Look the words up in the stopword set of the pipeline of these words
+    return MVP_text.pipeline(extra_words, exclude_words).remove_stopwords(string)
 
 ############ Prepare Job Description Function ############
 
-def prep_job_description_data(df, column, extra_words=[], exclude_words=[]):
+def prep_job_description_data(df, column, extra_words=[], exclude_words=[], 
+                              outputs=['clean', 'tokenized', 'stemmed', 'lemmatized'], processes=1, 
+                              cache=None):
     '''
     This function take in a df and the string name for a text column with 
     option to pass lists for extra_words and exclude_words and
     returns a df with the text article title, original text, stemmed text,
     lemmatized text, cleaned, tokenized, & lemmatized text with stopwords removed.
+    Only the columns listed in `outputs` are computed, cleaning and
+    tokenizing every text once. With `processes` > 1 the column is prepared
+    in chunks by a pool of worker processes. With a MVP_text.TextCache the
+    outputs of a description already prepared are read from the cache.
     '''
-    df['clean'] = df[column].apply(basic_clean)\
-                            .apply(tokenize)\
-                            .apply(remove_stopwords, 
-                                   extra_words=extra_words, 
-                                   exclude_words=exclude_words)\
-                            .apply(lemmatize)
-    df['tokenized'] = df[column].apply(basic_clean).apply(tokenize)
-    df['stemmed'] = df[column].apply(basic_clean).apply(stem)
-    df['lemmatized'] = df[column].apply(basic_clean).apply(lemmatize)
+    # Build the NLTK models and the stopword set once for the whole column
+    pipeline = MVP_text.pipeline(extra_words, exclude_words)
+    # Prepare the columns in one pass, over the descriptions not in the cache
+    if cache is not None:
+        prepared = cache.process(pipeline, df[column], outputs=outputs, processes=processes)
+    else:
+        prepared = pipeline.process(df[column], outputs=outputs, processes=processes)
+    for output in outputs:
+        df[output] = prepared[output]
     return df
\ No newline at end of file
@@ -1,6 +1,10 @@
 import pandas as pd
-import requests
 import os
+import sys
+
+# Shared HTTP client at the project root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import MVP_fetch
 
 # Geospatial Libraries
 import geopandas as gpd
@@ -44,7 +48,7 @@ def response_endpoint(endpoint):
     -------
     requests.models.Response object
     '''
-    get_request = requests.get(base_url() + endpoint)
+    get_request = MVP_fetch.get(base_url() + endpoint)
     return get_request
 
 
@@ -88,7 +92,7 @@ def page_iterator(data, data_path, stop_page):
     df = pd.DataFrame()
     
     for page in range(1, stop_page+1):
-        response = requests.get(base_url() + data_path + '?page=' + str(page))
+        response = MVP_fetch.get(base_url() + data_path + '?page=' + str(page))
         df = df.append(response.json()['payload'][f'{data}'])
 
     return df
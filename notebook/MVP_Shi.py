@@ -18,15 +18,19 @@ import datetime
 # NLP Libraries
 import nltk
 
-# AWS
-import boto3
-
 # Environment File
 import env_Shi
 
 # Import Self Defined Functions
 import MVP_Bojado
 
+# Job post store and skill matcher at the project root
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import MVP_store
+import MVP_skills
+
 ########################### Acquisition #################################
 def first_page_url_indeed(job_title, location):
     '''
@@ -335,78 +339,50 @@ def jobs_indeed(job_title, location, max_page=35):
     return df_jobs
 
 ########################### Preparation #################################
-def remove_duplicates(df):
-    '''
-    This function removes the duplicates in the dataframe based on title, location, 
-    company, job_link, and job_description
-    '''
-    # Define the columns for identifying duplicates
-    columns = ['title', 'location', 'company', 'job_link', 'job_description']
-    # Drop the duplicates except for the last occurrence
-    df.drop_duplicates(subset=columns, inplace=True, keep='last')
-    return df
-
-def compute_post_date(df):
+def compute_post_date(df, reference_date=None):
     '''
     This function computes the date of a job posting based on its post age
     and set the date as the index of the dataframe.
-    '''
-    # Create an empty list to hold the post date
-    post_date = []
-    # For loop the column post_age and convert the values to date
-    for age in df.post_age:
-        if age == 'Just posted' or age == 'Today':
-            date = datetime.date.today()
-            post_date.append(date)
-        else:
-            # Extract the number
-            num = re.findall(r'(\d+)', age)[0]
-            # Cast the string number to integer
-            num = int(num)
-            # Convert the integer to timedelta object
-            num = datetime.timedelta(days=num)
-            # Compute post date        
-            date = datetime.date.today()
-            date = date - num
-            post_date.append(date)
-    # Add post date as new column
-    df['date'] = post_date
+
+    Parameters
+    ----------
+    df : DataFrame
+        Job posts with a post_age column, e.g. 'Just posted', 'Today',
+        '1 day ago' or '30+ days ago'.
+    reference_date : date or str, default None
+        The day the job posts were acquired. Defaults to today.
+
+    Returns
+    -------
+    df : DataFrame
+        The job posts indexed by post date, most recent first.
+    '''
+    # The day the post ages are counted from
+    if reference_date is None:
+        reference_date = datetime.date.today()
+    reference_date = pd.Timestamp(reference_date).normalize()
+    # Parse each distinct post age once: there are only a few dozen of them.
+    # A missing post age becomes '' so it gets a code of its own and no date
+    codes, ages = pd.factorize(df.post_age.fillna('').astype(str))
+    ages = pd.Series(ages)
+    # Extract the number of days of the post ages at once
+    days = pd.to_numeric(ages.str.extract(r'(\d+)', expand=False))
+    # Job posts of the reference day have no number
+    days = days.mask(ages.isin(['Just posted', 'Today']), 0).to_numpy()
+    # Compute post date
+    df['date'] = reference_date - pd.to_timedelta(days[codes], unit='D')
     # Set the column post_date as the index and sort the values
     df = df.set_index('date').sort_index(ascending=False)
     return df
 
 def transform_old_file(df, date_string):
     '''
-    This function accepts old daily job posts and convert the post age to post date. 
+    This function accepts old daily job posts and convert the post age to post date,
+    counted from the day the file was acquired, e.g. '2021-01-05'.
     '''
     # Change column name to location
     df = df.rename(columns={'location': 'location'})
-    # Create an empty list to hold the post date
-    post_date = []
-    # For loop the column post_age and convert the values to date
-    for age in df.post_age:
-        if age == 'Just posted':
-            date = datetime.date.fromisoformat(date_string)
-            post_date.append(date)
-        elif age == 'Today':
-            date = datetime.date.fromisoformat(date_string)
-            post_date.append(date)
-        else:
-            # Extract the number
-            num = re.findall(r'(\d+)', age)[0]
-            # Cast the string number to integer
-            num = int(num)
-            # Convert the integer to timedelta object
-            num = datetime.timedelta(days=num)
-            # Compute post date        
-            date = datetime.date.fromisoformat(date_string)
-            date = date - num
-            post_date.append(date)
-    # Add post date as new column
-    df['date'] = post_date
-    # Set the column post_date as the index and sort the values
-    df = df.set_index('date').sort_index(ascending=False)
-    return df
+    return compute_post_date(df, reference_date=date_string)
 
 def clean_job_title(title):
     '''
@@ -416,36 +392,26 @@ def clean_job_title(title):
     title = title.split(sep="...")[0]
     return title
 
-def daily_update(df_new):
+def daily_update(df_new, initials):
     '''
     This function updates and prepares the job posts by adding daily new job postings 
-    and save as JSON file. 
+    and save as JSON file. `initials` are the initials of the job title, e.g. 'ds'.
+    The job posts are kept in the store df_<initials>_tx/ of the local database.
     '''
-    # Load the job posts based on the inputted job title
+    # Keep the job posts in the date-partitioned store of the job title
     database = env_Shi.database
-    print("Enter the INITIALS of the job title:")
-    initials = input()
-    df = pd.read_csv(f"{database}df_{initials}_tx_backup.csv")
-    num_jobs = df.shape[0]
-    # Convert the date column to datetime type
-    df.date = pd.to_datetime(df.date)
-    # Set the date column as the index and sort the index
-    df = df.set_index('date').sort_index(ascending=False)
-    
-    # Add the new job postings
-    df_new = compute_post_date(df_new)
-    df = pd.concat([df, df_new]).sort_index(ascending=False)
-    
-    # Remove the duplicates
-    df = remove_duplicates(df)
+    store = MVP_store.PartitionedStore(f"{database}df_{initials}_tx")
+    # Move the backup csv file into the store the first time
+    if not store.files():
+        store.import_csv(f"{database}df_{initials}_tx_backup.csv", datetime.date.today())
     
-    # Back up the jop postings as a csv file before data cleaning phase I
-    df.to_csv(f"{database}df_{initials}_tx_backup.csv")
-    num_new_jobs = df.shape[0] - num_jobs
+    # Add the new job postings: only they are checked against the fingerprint index
+    df_new = compute_post_date(df_new).reset_index()
+    new_files, num_new_jobs = store.append(df_new, datetime.date.today())
     print("New Jobs of Posted Today: ", num_new_jobs)
     
-    # Re-Load the dataset
-    df = pd.read_csv(f"{database}df_{initials}_tx_backup.csv")
+    # Load all the job postings
+    df = store.read()
     
     # Clean the location data: break the location to city, state, and zipcode
     location = df.location.str.split(', ', expand=True)
@@ -466,13 +432,13 @@ def daily_update(df_new):
     df.company_rating = df.company_rating.round(2)
     
     # Clean the text in the job description
-    df = MVP_Bojado.prep_job_description_data(df, 'job_description')
+    df = MVP_Bojado.prep_job_description_data(df, 'job_description', outputs=['clean'])
     
     # Clean the job title
     df.title = df.title.apply(clean_job_title)
     
     # Drop the redundant columns post_age and location
-    redundant_cols = ['post_age', 'location', 'tokenized', 'stemmed', 'lemmatized']
+    redundant_cols = ['post_age', 'location']
     df = df.drop(columns=redundant_cols)
     
     # Alther the data type of zipcode
@@ -483,16 +449,14 @@ def daily_update(df_new):
     return df
 
 ########################### Exploration #################################
-def read_job_postings_json():
+def read_job_postings_json(initials):
     '''
     This function reads the JSON file of prepared job postings into a pandas dataframe 
-    based on a job title and set the date as the index.
+    based on the initials of a job title, e.g. 'ds', and set the date as the index.
     '''
     # Load the file path of the local database
     database = env_Shi.database
     # Create the file name
-    print("Enter the INITIALS of the job title:")
-    initials = input()
     file_name = 'df_' + initials + '_tx_prepared_backup.json'
     # Read the JSON file into a pandas dataframe
     df = pd.read_json(f'{database}{file_name}')
@@ -712,92 +676,63 @@ def top_skills_ds_v2(company, k):
     df_skills.sort_values(by=company, ascending=False, inplace=True)
     return df_skills.head(k)
 
-def top_skill_frequency(df, df_top):
+def top_skill_frequency(df, df_top, library_type, initials, sink=None, merge=False, merged_sink=None):
     '''
-    This function accepts the dataframe of the prepared job postings and the top k skills and provides
-    three options: 
-    - to save the frequencies of the top skills over time as a JSON file and upload to AWS.
-    - to return a dataframe containing only the frequecies of the top skills over time.
-    - to add the frequencies of the top skills over time to the original dataframe
-    - to save the merged dataframe as JSON file in the database. 
+    This function accepts the dataframe of the prepared job postings (with the date in the right format
+    as the index), the top k skills, the type of library (tech, soft or general) and the initials of 
+    the job title, and returns a dataframe containing only the frequencies of the top skills over time. 
+    - With a sink (see MVP_export), the frequencies are saved as `{initials}_top_{library_type}_ts.json`,
+      e.g. uploaded to the AWS Bucket additionaljobinfo.
+    - With `merge=True`, the frequencies are added to the original dataframe and the merged dataframe 
+      is returned instead.
+    - With a merged_sink, the merged dataframe is saved as `df_{initials}_tx_top_{library_type}_ts.json`,
+      e.g. in the database with MVP_export.LocalSink(env_Shi.database).
     '''
-    # Reminder
-    print("Please insure the date is in the right format")
-    
-    # Confirm the library type
-    print("Confirm TYPE of library: tech or soft or general")
-    library_type = input()
-
-    # Confirm the job title
-    print("Enter the INITIALS of the job title:")
-    initials = input()
-    
     # Create a list of the top k skills
     skill_list = df_top.iloc[:, 0].to_list()
     
-    # Create an empty dictionary to hold the frequency of the skill in each observation
-    dic_frequency = {}    
-    # Loop through the list of skills to compute its frequency in each observation
-    for skill in skill_list:
-        list_frequency = []
-        for string in df.clean.values:
-            matches = re.findall(f" {skill} ", string)
-            frequency = len(matches)
-            list_frequency.append(frequency)
-        dic_frequency[skill]=list_frequency
-        
-    # Convert the dictionary into the dataframe and set the index the same as df
-    df_frequency = pd.DataFrame(dic_frequency, index=df.index)
+    # Count all the top skills in each observation in a single pass, with the index the same as df
+    df_frequency = MVP_skills.skill_matcher(skill_list).frame(df.clean.values, index=df.index)
     
-    # Save as JSON file and upload to AWS
-    print("Do you want to save the dataframe as JSON and upload to AWS? (Y/N)")
-    save_option = input()
-    if save_option == "Y" or save_option == 'y':
+    # Save as JSON file
+    if sink is not None:
         df_freq_copy = df_frequency.reset_index()
         df_freq_copy.date = df_freq_copy.date.apply(lambda i: i.strftime("%Y-%m-%d"))
-        database = env_Shi.database
-        file_name = f"{initials}_top_{library_type}_ts.json"
-        df_freq_copy.to_json(f"{database}{file_name}", orient="records")
-        s3 = boto3.resource("s3")
-        s3.Bucket("additionaljobinfo").upload_file(f"{database}{file_name}", file_name)
-    elif save_option == "N" or save_option == 'n':
-        print("You can manually save it by yourself")
+        sink.write(df_freq_copy, f"{initials}_top_{library_type}_ts.json")
         
     # Merge two dataframe together
-    print("Do you want to merge the dataframes? (Y/N)")
-    merge_option = input()
-    if merge_option == "Y" or merge_option == 'y':
+    if merge:
         df_frequency = pd.concat([df, df_frequency], axis=1)
         
         # Save the merged dataframe as JSON
-        print("Do you want to save the merged dataframe? (Y/N)")
-        save_option = input()
-        if save_option == 'Y' or save_option == 'y':
+        if merged_sink is not None:
             df_freq_copy = df_frequency.reset_index()
             df_freq_copy.date = df_freq_copy.date.apply(lambda i: i.strftime("%Y-%m-%d"))
-            database = env_Shi.database
-            file_name = f"df_{initials}_tx_top_{library_type}_ts.json"
-            df_freq_copy.to_json(f"{database}{file_name}", orient="records")
-        elif save_option == 'N' or save_option == 'n':
-            print("You can manually save it by yourself")
-
-    elif merge_option == "N" or merge_option == 'n':
-        print("You can manually merge it by yourself")
+            merged_sink.write(df_freq_copy, f"df_{initials}_tx_top_{library_type}_ts.json")
     
     return df_frequency
 
-def plot_top_skill_ts(df, df_top):
+def plot_top_skill_ts(df, df_top, cube=None, role=None, freq='W'):
     '''
     This function accetps the dataframe of preapred job postings with the frequencies of the skills
-    and plot how popular each skill changes over time. 
+    and plot how popular each skill changes over time. Given a skill cube (MVP_cube.SkillCube) and 
+    the initials of the job title as the role, the pre-aggregated time series are read from the cube 
+    instead and df can be None; `freq` is 'D', 'W' or 'M'.
     '''
     # Set up the size of the plot
     plt.figure(figsize=(11, 8))
     # Create a list of the top skills
     skill_list = df_top.iloc[:, 0].to_list()
-    # Resample the dataset by week and plot the mean of the frequency of each skill per job posting
-    for skill in skill_list:
-        df.resample('W')[skill].mean().plot(label=f'{skill} Weekly')
+    label = {'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly'}[freq]
+    if cube is not None:
+        # Read the mean of the frequency of each skill per job posting from the cube
+        df_ts = cube.series(role, skill_list, freq=freq)
+        for skill in skill_list:
+            df_ts[skill].plot(label=f'{skill} {label}')
+    else:
+        # Resample the dataset by period and plot the mean of the frequency of each skill per job posting
+        for skill in skill_list:
+            df.resample(freq)[skill].mean().plot(label=f'{skill} {label}')
     
     # Name the plot
     plt.title("How Popular the Top 5 Skills Are Over Time", fontweight='bold')